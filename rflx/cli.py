@@ -9,7 +9,7 @@ from rflx.common import flat_name
 from rflx.generator import Generator, InternalError
 from rflx.graph import Graph
 from rflx.model import Model, ModelError
-from rflx.parser import Parser, ParserError
+from rflx.parser import ModelCache, Parser, ParserError
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
@@ -26,6 +26,9 @@ def main(argv: List[str]) -> Union[int, str]:
         "-q", "--quiet", action="store_true", help="disable logging to standard output"
     )
     parser.add_argument("--version", action="store_true")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the cache of verified specifications"
+    )
 
     subparsers = parser.add_subparsers(dest="subcommand")
 
@@ -94,7 +97,7 @@ def main(argv: List[str]) -> Union[int, str]:
 
 
 def check(args: argparse.Namespace) -> None:
-    parse(args.files)
+    parse(args.files, not args.no_cache)
 
 
 def generate(args: argparse.Namespace) -> None:
@@ -107,7 +110,7 @@ def generate(args: argparse.Namespace) -> None:
 
     generator = Generator(args.prefix, reproducible=os.environ.get("RFLX_REPRODUCIBLE") is not None)
 
-    model = parse(args.files)
+    model = parse(args.files, not args.no_cache)
     generator.generate(model)
 
     generator.write_units(directory)
@@ -116,13 +119,17 @@ def generate(args: argparse.Namespace) -> None:
         generator.write_top_level_package(directory)
 
 
-def parse(files: List) -> Model:
-    parser = Parser()
-
+def parse(files: List, cache: bool = True) -> Model:
     for f in files:
         if not Path(f).is_file():
             raise Error(f'file not found: "{f}"')
 
+    if cache:
+        return ModelCache().create_model([Path(f) for f in files])
+
+    parser = Parser()
+
+    for f in files:
         parser.parse(Path(f))
 
     return parser.create_model()
@@ -133,7 +140,7 @@ def graph(args: argparse.Namespace) -> None:
     if not directory.is_dir():
         raise Error(f'directory not found: "{directory}"')
 
-    model = parse(args.files)
+    model = parse(args.files, not args.no_cache)
 
     for m in model.messages:
         message = flat_name(m.full_name)
@@ -226,7 +226,7 @@ def message_structure_invariant(
     source = link.source
     target = link.target
 
-    if target is FINAL:
+    if target == FINAL:
         return TRUE
 
     field_type = message.types[target]
@@ -1 +1,2 @@
+from .cache import ModelCache  # noqa: F401
 from .parser import Parser, ParserError  # noqa: F401
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from pyparsing import ParseBaseException, Regex
+
+from rflx import __version__
+from rflx.model import Model
+
+from . import grammar
+from .parser import Parser
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 64 * 2 ** 20
+
+CONTEXT_CLAUSE = grammar.context_clause().ignore(Regex(r"--.*"))
+
+
+class ModelCache:
+    """On-disk cache of verified models, addressed by the contents of the specification files."""
+
+    def __init__(self, directory: Path = None, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory if directory is not None else default_directory()
+        self.max_size = max_size
+
+    def create_model(self, files: Sequence[Path]) -> Model:
+        """Return the model of the given files, which is parsed only if it is not cached."""
+        key = self.key(files)
+        model = self.load(key)
+        if model is None:
+            parser = Parser()
+            for f in files:
+                parser.parse(f)
+            model = parser.create_model()
+            self.store(key, model)
+        return model
+
+    def key(self, files: Sequence[Path]) -> str:
+        digest = hashlib.sha256(__version__.encode())
+        for f in closure(files):
+            digest.update(f.name.encode() + b"\0")
+            try:
+                digest.update(hashlib.sha256(f.read_bytes()).digest())
+            except OSError:
+                digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[Model]:
+        path = self.directory / f"{key}.pickle"
+        try:
+            # Unpickling can execute arbitrary code, so cached models are only loaded if they
+            # cannot have been written by other users.
+            if not private(self.directory) or not private(path):
+                log.warning("Ignoring cached model %s: writable by other users", path)
+                return None
+            with open(path, "rb") as f:
+                model = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning("Ignoring cached model %s: %s", path, e)
+            return None
+        if not isinstance(model, Model):
+            log.warning("Ignoring cached model %s: invalid content", path)
+            return None
+        try:
+            os.utime(path)
+        except OSError as e:
+            log.warning("Updating access time of cached model %s failed: %s", path, e)
+        log.info("Loading cached model %s", path)
+        return model
+
+    def store(self, key: str, model: Model) -> None:
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            descriptor, name = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(descriptor, "wb") as f:
+                    pickle.dump(model, f, pickle.HIGHEST_PROTOCOL)
+                os.replace(name, self.directory / f"{key}.pickle")
+            finally:
+                if os.path.exists(name):
+                    os.unlink(name)
+            self.__evict()
+        except (OSError, pickle.PicklingError, RecursionError) as e:
+            log.warning("Caching model failed: %s", e)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.pickle"):
+            path.unlink()
+
+    def __evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        entries.sort(key=lambda e: e[0].st_mtime)
+        size = sum(status.st_size for status, _ in entries)
+        for status, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= status.st_size
+
+
+def default_directory() -> Path:
+    """Return the directory given by RFLX_CACHE_DIR or the RecordFlux user cache directory."""
+    directory = os.environ.get("RFLX_CACHE_DIR")
+    if directory:
+        return Path(directory)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "RecordFlux"
+
+
+def private(path: Path) -> bool:
+    """Return True if the file is owned by the current user and not writable by other users."""
+    status = path.stat()
+    return status.st_uid == os.getuid() and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def closure(files: Sequence[Path]) -> List[Path]:
+    """Return the given files and all files they depend on by context clauses."""
+    result: List[Path] = []
+    pending = list(files)
+    while pending:
+        f = pending.pop(0)
+        if f in result:
+            continue
+        result.append(f)
+        try:
+            context = CONTEXT_CLAUSE.parseString(f.read_text())[0]
+        except (OSError, UnicodeDecodeError, ParseBaseException):
+            continue
+        pending.extend(f.parent / f"{item.lower()}.rflx" for item in context.items)
+    return result
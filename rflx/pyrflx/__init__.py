@@ -1,10 +1,22 @@
 from .bitstring import Bitstring  # noqa: F401
+from .classifier import Classifier  # noqa: F401
+from .filter import Filter  # noqa: F401
+from .framing import Framer  # noqa: F401
+from .incremental import Complete, IncrementalParser, NeedMore  # noqa: F401
 from .package import Package  # noqa: F401
 from .pyrflx import PyRFLX  # noqa: F401
+from .stream import (  # noqa: F401
+    FrameStreamProtocol,
+    MessageDatagramProtocol,
+    MessageStreamProtocol,
+    read_frame,
+    read_message,
+)
 from .typevalue import (  # noqa: F401
     ArrayValue,
     EnumValue,
     IntegerValue,
+    MessageSchema,
     MessageValue,
     NotInitializedError,
     OpaqueValue,
@@ -2,45 +2,97 @@ from typing import Sequence, Union
 
 
 class Bitstring:
+    """Immutable view on a sequence of bits.
+
+    The bits are stored as a reference to a bytes object together with the bit offset of the first
+    bit and the number of bits. Slicing creates a new view on the same bytes object without
+    copying any data.
+    """
+
+    __slots__ = ("_data", "_first", "_length")
+
     def __init__(self, bits: str = ""):
         if not self.valid_bitstring(bits):
             raise ValueError("Bitstring does not consist of only 0 and 1")
-        self._bits = bits
+        length = len(bits)
+        value = int(bits, 2) if bits else 0
+        self._data = (value << (-length % 8)).to_bytes((length + 7) // 8, "big")
+        self._first = 0
+        self._length = length
 
     def __add__(self, other: "Bitstring") -> "Bitstring":
-        return Bitstring(self._bits + other._bits)
-
-    def __iadd__(self, other: "Bitstring") -> "Bitstring":
-        self._bits += other._bits
-        return self
+        return Bitstring.from_int((int(self) << other._length) | int(other), len(self) + len(other))
 
     def __getitem__(self, key: Union[int, slice]) -> "Bitstring":
-        if isinstance(key, slice) and isinstance(key.stop, int) and len(self._bits) < key.stop:
+        if isinstance(key, int):
+            key = slice(key, key + 1 if key != -1 else None)
+        if isinstance(key.stop, int) and self._length < key.stop:
             raise IndexError
-        return Bitstring(self._bits[key])
+        start, stop, step = key.indices(self._length)
+        if step != 1:
+            return Bitstring(str(self)[key])
+        return self._view(self._first + start, max(stop - start, 0))
 
     def __str__(self) -> str:
-        return self._bits
+        if self._length == 0:
+            return ""
+        return format(int(self), f"0{self._length}b")
 
     def __int__(self) -> int:
-        return int(self._bits, 2)
+        if self._length == 0:
+            return 0
+        last = self._first + self._length
+        value = int.from_bytes(self._data[self._first // 8 : (last + 7) // 8], "big")
+        return (value >> (-last % 8)) & ((1 << self._length) - 1)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Bitstring):
             return NotImplemented
-        return self._bits == other._bits
+        return self._length == other._length and int(self) == int(other)
 
     def __bytes__(self) -> bytes:
-        return b"".join(
-            [int(self._bits[i : i + 8], 2).to_bytes(1, "big") for i in range(0, len(self._bits), 8)]
-        )
+        if self._first % 8 == 0 and self._length % 8 == 0:
+            first = self._first // 8
+            last = first + self._length // 8
+            if first == 0 and last == len(self._data):
+                return self._data
+            return self._data[first:last]
+        # a trailing incomplete byte is represented by the value of its remaining bits
+        value = int(self)
+        remainder = self._length % 8
+        full_bytes = (value >> remainder).to_bytes(self._length // 8, "big")
+        if remainder:
+            return full_bytes + (value & ((1 << remainder) - 1)).to_bytes(1, "big")
+        return full_bytes
 
     def __len__(self) -> int:
-        return len(self._bits)
+        return self._length
+
+    def _view(self, first: int, length: int) -> "Bitstring":
+        # pylint: disable=protected-access
+        view = Bitstring.__new__(Bitstring)
+        view._data = self._data
+        view._first = first
+        view._length = length
+        return view
 
     @classmethod
     def from_bytes(cls, msg: bytes) -> "Bitstring":
-        return cls(format(int.from_bytes(msg, "big"), f"0{len(msg) * 8}b"))
+        bitstring = cls.__new__(cls)
+        bitstring._data = bytes(msg)
+        bitstring._first = 0
+        bitstring._length = len(bitstring._data) * 8
+        return bitstring
+
+    @classmethod
+    def from_int(cls, value: int, length: int) -> "Bitstring":
+        assert value >= 0
+        length = max(length, value.bit_length())
+        bitstring = cls.__new__(cls)
+        bitstring._data = (value << (-length % 8)).to_bytes((length + 7) // 8, "big")
+        bitstring._first = 0
+        bitstring._length = length
+        return bitstring
 
     @staticmethod
     def valid_bitstring(bitstring: str) -> bool:
@@ -48,8 +100,54 @@ class Bitstring:
 
     @staticmethod
     def join(iterable: Sequence["Bitstring"]) -> "Bitstring":
-        joined_bitstring = Bitstring()
+        value = 0
+        length = 0
         for i in iterable:
-            joined_bitstring += i
+            value = (value << len(i)) | int(i)
+            length += len(i)
+
+        return Bitstring.from_int(value, length)
+
+
+class BitWriter:
+    """Writer which appends bits to a bytearray.
+
+    The bits are stored left-aligned, i.e. the unused bits of an incomplete last byte are zero.
+    """
+
+    __slots__ = ("_data", "_length")
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def write(self, bits: Bitstring) -> None:
+        length = len(bits)
+        if length == 0:
+            return
+        offset = self._length % 8
+        if offset == 0 and length % 8 == 0:
+            self._data += bytes(bits)
+        else:
+            value = int(bits)
+            if offset:
+                value |= (self._data.pop() >> (8 - offset)) << length
+            total = offset + length
+            self._data += (value << (-total % 8)).to_bytes((total + 7) // 8, "big")
+        self._length += length
+
+    def truncate(self, length: int) -> None:
+        """Discard all bits following the given number of bits."""
+        assert 0 <= length <= self._length
+        del self._data[(length + 7) // 8 :]
+        if length % 8:
+            self._data[-1] &= (0xFF << (8 - length % 8)) & 0xFF
+        self._length = length
 
-        return joined_bitstring
+    @property
+    def bitstring(self) -> Bitstring:
+        bits = Bitstring.from_bytes(bytes(self._data))
+        return bits if len(bits) == self._length else bits[: self._length]
@@ -0,0 +1,131 @@
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from rflx.model import FINAL, Message, Refinement
+from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.plan import ParsePlan, PlanStep, parse_plan
+
+Span = Tuple[int, int]
+
+
+class _Node:
+    """Decision on the value of the bits at a constant position of the data."""
+
+    __slots__ = ("first", "end", "branches", "default")
+
+    def __init__(self, span: Span, branches: Dict[int, "_Tree"], default: "_Tree") -> None:
+        self.first = span[0]
+        self.end = span[0] + span[1]
+        self.branches = branches
+        self.default = default
+
+
+_Tree = Union[_Node, Tuple[int, ...]]
+
+
+class Classifier:
+    """Determine which of several message types are validly represented by some data."""
+
+    MAX_RANGE = 256
+
+    def __init__(
+        self, messages: Sequence[Message], refinements: Sequence[Refinement] = None
+    ) -> None:
+        self.messages = list(messages)
+        self.refinements = refinements or []
+        self.__checks = [self.__field_checks(parse_plan(m)) for m in self.messages]
+        self.__trees: Dict[Tuple[Tuple[int, ...], FrozenSet[Span]], _Tree] = {}
+        self.__tree = self.__build(tuple(range(len(self.messages))), frozenset())
+        self.__trees.clear()
+
+    def classify(self, data: Union[bytes, Bitstring]) -> List[Message]:
+        """Return all candidates which are validly represented by data, in the given order."""
+        if isinstance(data, bytes):
+            data = Bitstring.from_bytes(data)
+        return [
+            self.messages[i]
+            for i in self.__select(data)
+            if parse_plan(self.messages[i]).validate(data, self.refinements)[0]
+        ]
+
+    def candidates(self, data: Union[bytes, Bitstring]) -> List[Message]:
+        """Return the candidates which are not excluded by the decision tree."""
+        if isinstance(data, bytes):
+            data = Bitstring.from_bytes(data)
+        return [self.messages[i] for i in self.__select(data)]
+
+    def __select(self, data: Bitstring) -> Tuple[int, ...]:
+        tree = self.__tree
+        while isinstance(tree, _Node):
+            if tree.end > len(data):
+                tree = tree.default
+            else:
+                tree = tree.branches.get(int(data[tree.first : tree.end]), tree.default)
+        return tree
+
+    def __build(self, candidates: Tuple[int, ...], used: FrozenSet[Span]) -> _Tree:
+        key = (candidates, used)
+        if key in self.__trees:
+            return self.__trees[key]
+        tree: _Tree = candidates
+        spans = Counter(s for c in candidates for s in self.__checks[c] if s not in used)
+        if len(candidates) > 1 and spans:
+            span = min(spans, key=lambda s: (-spans[s], s))
+            values = {v for c in candidates for v in self.__checks[c].get(span, [])}
+            tree = _Node(
+                span,
+                {
+                    v: self.__build(
+                        tuple(
+                            c
+                            for c in candidates
+                            if span not in self.__checks[c] or v in self.__checks[c][span]
+                        ),
+                        used | {span},
+                    )
+                    for v in values
+                },
+                self.__build(
+                    tuple(c for c in candidates if span not in self.__checks[c]), used | {span}
+                ),
+            )
+        self.__trees[key] = tree
+        return tree
+
+    def __field_checks(self, plan: ParsePlan) -> Dict[Span, FrozenSet[int]]:
+        """Return the permitted values of all scalar fields which are part of every message."""
+        checks: Dict[Span, FrozenSet[int]] = {}
+        step = plan.initial
+        while True:
+            targets = {l.target for l in step.links}
+            if len(targets) != 1 or FINAL.name in targets:
+                break
+            step = plan.steps[targets.pop()]
+            firsts = {l.first for l in step.incoming}
+            lengths = {l.length for l in step.incoming}
+            if len(firsts) != 1 or len(lengths) != 1:
+                continue
+            first = firsts.pop()
+            length = lengths.pop()
+            if first is None or length is None:
+                continue
+            values = self.__permitted_values(plan, step)
+            if values is not None:
+                checks[(first, length)] = values
+        return checks
+
+    def __permitted_values(self, plan: ParsePlan, step: PlanStep) -> Optional[FrozenSet[int]]:
+        info = step.scalar
+        if info is None:
+            return None
+        values = plan.condition_values(step)
+        if info.enumeration:
+            if not info.always_valid:
+                literals = set(info.names)
+                values = literals if values is None else values & literals
+        elif values is not None:
+            values = {v for v in values if info.valid(v)}
+        elif info.first > 0 or info.last < 2 ** info.size - 1:
+            if info.last - info.first < self.MAX_RANGE:
+                values = set(range(info.first, info.last + 1))
+        return frozenset(values) if values is not None else None
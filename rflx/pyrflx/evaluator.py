@@ -0,0 +1,236 @@
+import operator
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+from rflx.expression import (
+    Add,
+    Aggregate,
+    And,
+    BinExpr,
+    BooleanFalse,
+    BooleanTrue,
+    Div,
+    Equal,
+    Expr,
+    First,
+    Greater,
+    GreaterEqual,
+    Last,
+    Length,
+    Less,
+    LessEqual,
+    Mod,
+    Mul,
+    Not,
+    NotEqual,
+    Number,
+    Or,
+    OrElse,
+    Pow,
+    Sub,
+    Variable,
+)
+
+Environment = Mapping[str, int]
+Function = Callable[[Environment], Any]
+
+RELATIONS: Dict[type, Callable[[int, int], bool]] = {
+    Less: operator.lt,
+    LessEqual: operator.le,
+    Equal: operator.eq,
+    GreaterEqual: operator.ge,
+    Greater: operator.gt,
+    NotEqual: operator.ne,
+}
+
+ARITHMETIC_OPERATIONS: Dict[type, Callable[[int, int], int]] = {
+    Sub: operator.sub,
+    Pow: operator.pow,
+    Mod: operator.mod,
+}
+
+
+class Evaluator:
+    """Expression compiled into a Python function.
+
+    The function is evaluated in an environment which maps the names of variables and attributes
+    (e.g. "Length" or "Length'First") to integers. Literals are replaced by their values during
+    the compilation. Like the simplification of an expression, the evaluation results in None
+    if the value of the expression cannot be determined, e.g. if a variable is undefined. As the
+    compiled function cannot be pickled, it is omitted on pickling and the expression is compiled
+    again on unpickling.
+    """
+
+    def __init__(self, expr: Expr, literals: Mapping[str, int] = None) -> None:
+        self.expr = expr
+        self.__literals = literals or {}
+        self.__names: Set[str] = set()
+        self.__function = self.__compile(expr.simplified())
+
+    def __call__(self, env: Environment) -> Optional[int]:
+        return self.__function(env)
+
+    def __repr__(self) -> str:
+        return f"Evaluator({self.expr})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["_Evaluator__function"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__function = self.__compile(self.expr.simplified())
+
+    @property
+    def names(self) -> Set[str]:
+        """Return all names of the environment which are referenced by the expression."""
+        return self.__names
+
+    # pylint: disable=too-many-return-statements,too-many-branches
+    def __compile(self, expr: Expr) -> Function:
+        if isinstance(expr, BooleanTrue):
+            return lambda env: True
+        if isinstance(expr, BooleanFalse):
+            return lambda env: False
+        if isinstance(expr, Number):
+            return _constant(expr.value)
+        if isinstance(expr, Variable):
+            if expr.name in self.__literals:
+                value = self.__literals[expr.name]
+                return _constant(-value if expr.negative else value)
+            return self.__name(expr.name, expr.negative)
+        if isinstance(expr, (First, Last, Length)) and isinstance(expr.prefix, Variable):
+            return self.__name(f"{expr.prefix}'{expr.__class__.__name__}", expr.negative)
+        if isinstance(expr, OrElse):
+            return _disjunction([self.__compile(t) for t in expr.terms])
+        if isinstance(expr, And):
+            return _conjunction([self.__compile(t) for t in expr.terms])
+        if isinstance(expr, Or):
+            return _disjunction([self.__compile(t) for t in expr.terms])
+        if isinstance(expr, Not):
+            return _negation(self.__compile(expr.expr))
+        if isinstance(expr, (Add, Mul)):
+            return _accumulation(
+                [self.__compile(t) for t in expr.terms],
+                operator.add if isinstance(expr, Add) else operator.mul,
+                expr.neutral_element(),
+            )
+        if isinstance(expr, Div):
+            return _division(self.__compile(expr.left), self.__compile(expr.right))
+        if isinstance(expr, BinExpr) and type(expr) in ARITHMETIC_OPERATIONS:
+            return _operation(
+                self.__compile(expr.left),
+                self.__compile(expr.right),
+                ARITHMETIC_OPERATIONS[type(expr)],
+            )
+        if isinstance(expr, BinExpr) and type(expr) in RELATIONS:
+            if isinstance(expr, (Equal, LessEqual, GreaterEqual)) and expr.left == expr.right:
+                return lambda env: True
+            return _relation(
+                self.__compile(expr.left), self.__compile(expr.right), RELATIONS[type(expr)]
+            )
+        if isinstance(expr, Aggregate):
+            return _aggregate([self.__compile(e) for e in expr.elements])
+        return lambda env: None
+
+    def __name(self, name: str, negative: bool) -> Function:
+        self.__names.add(name)
+        if negative:
+            return lambda env: -env[name] if name in env else None
+        return lambda env: env.get(name)
+
+
+def _constant(value: int) -> Function:
+    return lambda env: value
+
+
+def _conjunction(terms: List[Function]) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        result: Optional[bool] = True
+        for term in terms:
+            value = term(env)
+            if value is None:
+                result = None
+            elif not value:
+                return False
+        return result
+
+    return function
+
+
+def _disjunction(terms: List[Function]) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        result: Optional[bool] = False
+        for term in terms:
+            value = term(env)
+            if value is None:
+                result = None
+            elif value:
+                return True
+        return result
+
+    return function
+
+
+def _negation(term: Function) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        value = term(env)
+        return None if value is None else not value
+
+    return function
+
+
+def _accumulation(
+    terms: List[Function], operation: Callable[[int, int], int], neutral_element: int
+) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        result = neutral_element
+        for term in terms:
+            value = term(env)
+            if value is None:
+                return None
+            result = operation(result, value)
+        return result
+
+    return function
+
+
+def _operation(left: Function, right: Function, operation: Callable[[int, int], int]) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        left_value = left(env)
+        right_value = right(env)
+        if left_value is None or right_value is None:
+            return None
+        return operation(left_value, right_value)
+
+    return function
+
+
+def _division(left: Function, right: Function) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        left_value = left(env)
+        right_value = right(env)
+        if left_value is None or not right_value or left_value % right_value != 0:
+            return None
+        return left_value // right_value
+
+    return function
+
+
+def _relation(left: Function, right: Function, relation: Callable[[int, int], bool]) -> Function:
+    def function(env: Environment) -> Optional[int]:
+        left_value = left(env)
+        right_value = right(env)
+        if left_value is None or right_value is None:
+            return None
+        return relation(left_value, right_value)
+
+    return function
+
+
+def _aggregate(elements: List[Function]) -> Function:
+    def function(env: Environment) -> Optional[tuple]:
+        values = tuple(e(env) for e in elements)
+        return None if None in values else values
+
+    return function
@@ -0,0 +1,115 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Union
+
+from pyparsing import ParseException, ParseFatalException
+
+from rflx.expression import Expr
+from rflx.model import Message, Opaque, Refinement
+from rflx.parser import grammar
+from rflx.parser.parser import ParserError
+from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.evaluator import Evaluator
+from rflx.pyrflx.plan import parse_plan
+
+
+class Filter:
+    """Condition on the fields of a message and of the messages contained in it.
+
+    The fields referenced by the condition must be unique among all these messages.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        condition: Union[str, Expr],
+        refinements: Sequence[Refinement] = None,
+    ) -> None:
+        self.message = message
+        self.refinements = refinements or []
+        if isinstance(condition, str):
+            try:
+                condition = grammar.logical_expression().parseString(condition, parseAll=True)[0]
+            except (ParseException, ParseFatalException) as e:
+                raise ParserError("\n" + ParseException.explain(e, 0))
+        assert isinstance(condition, Expr)
+        self.condition = condition
+
+        literals: Dict[str, int] = {}
+        fields: Dict[str, Set[str]] = {}
+        for m in self.__contained_messages(message):
+            literals.update(parse_plan(m).literals)
+            for f in m.fields:
+                fields.setdefault(f.name, set()).add(str(m.identifier))
+        self.__predicate = Evaluator(condition, literals)
+        self.__fields = {n.split("'")[0] for n in self.__predicate.names}
+        unknown = self.__fields - fields.keys()
+        if unknown:
+            raise ValueError(f"unknown name in condition: {', '.join(sorted(unknown))}")
+        ambiguous = {f for f in self.__fields if len(fields[f]) > 1}
+        if ambiguous:
+            raise ValueError(f"ambiguous name in condition: {', '.join(sorted(ambiguous))}")
+        self.__last: Dict[str, int] = {}
+        self.__last_relevant_field(message)
+
+    def match(self, data: Union[bytes, Bitstring]) -> bool:
+        """Return True if the message contained in data satisfies the condition."""
+        if isinstance(data, bytes):
+            data = Bitstring.from_bytes(data)
+        return self.__match(self.message, data, {}) is True
+
+    def filter(self, stream: Iterable[bytes]) -> Iterator[bytes]:
+        """Return all buffers of a stream which contain a message satisfying the condition."""
+        return (data for data in stream if self.match(data))
+
+    def __match(self, message: Message, data: Bitstring, values: Dict[str, int]) -> Optional[bool]:
+        plan = parse_plan(message)
+        last = self.__last[str(message.identifier)]
+        env: Dict[str, int] = {}
+
+        for step, _, value in plan.walk(data, env):
+            if step.name in self.__fields:
+                for key in [
+                    step.name,
+                    f"{step.name}'First",
+                    f"{step.name}'Length",
+                    f"{step.name}'Last",
+                ]:
+                    if key in env:
+                        values.setdefault(key, env[key])
+                result = self.__predicate(values)
+                if result is not None:
+                    return bool(result)
+            if isinstance(step.type, Opaque):
+                sdu = plan.refined_message(step.name, env, self.refinements)
+                if sdu is not None and self.__last[str(sdu.identifier)] >= 0:
+                    result = self.__match(sdu, value, values)
+                    if result is not None:
+                        return result
+            if plan.index[step.name] >= last:
+                break
+
+        return None
+
+    def __contained_messages(self, message: Message) -> List[Message]:
+        messages = [message]
+        for m in messages:
+            for ref in self.refinements:
+                if ref.pdu.name == m.name and all(ref.sdu is not n for n in messages):
+                    messages.append(ref.sdu)
+        return messages
+
+    def __last_relevant_field(self, message: Message) -> int:
+        """Return the index of the last field of a message which is relevant for the condition.
+
+        A field is relevant if it is referenced by the condition or if it may contain a message
+        with relevant fields. The result is negative if a message contains no relevant fields.
+        """
+        identifier = str(message.identifier)
+        if identifier not in self.__last:
+            self.__last[identifier] = -1
+            plan = parse_plan(message)
+            indices = [plan.index[f.name] for f in message.fields if f.name in self.__fields]
+            for ref in self.refinements:
+                if ref.pdu.name == message.name and self.__last_relevant_field(ref.sdu) >= 0:
+                    indices.append(plan.index[ref.field.name])
+            self.__last[identifier] = max(indices, default=-1)
+        return self.__last[identifier]
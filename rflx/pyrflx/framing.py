@@ -0,0 +1,122 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from rflx.model import FINAL, Message
+from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.incremental import NeedMore
+from rflx.pyrflx.plan import parse_plan
+
+
+class Framer:
+    """Determine the length of messages from their header.
+
+    The length of a message is the last bit of the last field on the path of the message. It is
+    computed from the first and length expressions of the links, e.g. `Length * 8` in TLS records
+    or `Total_Length * 8 - ...` in IPv4 packets. Only the fields referenced by any condition, first
+    or length expression are decoded, so that the payload of a message is not needed to frame it.
+    """
+
+    def __init__(self, message: Message) -> None:
+        self.message = message
+        self.__plan = parse_plan(message)
+        names: Set[str] = set()
+        for link in self.__plan.links:
+            names |= link.condition.names
+            for evaluator in [link.first_evaluator, link.length_evaluator]:
+                if evaluator is not None:
+                    names |= evaluator.names
+        self.__referenced = {n for n in names if n in self.__plan.steps}
+        self.__header = 0
+
+    def length(self, data: Union[bytes, Bitstring]) -> Union[NeedMore, int]:
+        """Return the number of bits of the message at the start of data.
+
+        If data is too short to determine the length, the number of missing bits is returned as
+        NeedMore. This number only covers the next field needed to continue, so that the length
+        should be requested again with more data.
+        """
+        if isinstance(data, bytes):
+            data = Bitstring.from_bytes(data)
+        plan = self.__plan
+        env: Dict[str, int] = {}
+        link = plan.initial.successor
+        position = 0
+
+        while link is not None and link.target != FINAL.name:
+            step = plan.steps[link.target]
+            first = link.first
+            if first is None:
+                first = link.first_evaluator(env) if link.first_evaluator is not None else position
+                if first is None:
+                    raise ValueError(f"cannot determine first bit of field {step.name}")
+            length = link.length
+            if length is None and link.length_evaluator is not None:
+                length = link.length_evaluator(env)
+            if length is None:
+                raise ValueError(
+                    f"length of {self.message.full_name} is not determined by its fields:"
+                    f" field {step.name} has no specified length"
+                )
+            if step.scalar is not None and step.name in self.__referenced:
+                if first + length > len(data):
+                    return NeedMore(first + length - len(data))
+                number = int(data[first : first + length])
+                if not step.scalar.valid(number):
+                    raise ValueError(f"invalid value {number} of field {step.name}")
+                if step.scalar.known(number):
+                    env[step.name] = number
+            env[f"{step.name}'First"] = first
+            env[f"{step.name}'Length"] = length
+            env[f"{step.name}'Last"] = first + length - 1
+            link = plan.next_link(step, env)
+            if link is None:
+                raise ValueError(f"no valid successor of field {step.name}")
+            position = first + length
+
+        return position
+
+    def split(self, buffer: Union[bytes, bytearray]) -> Tuple[List[bytes], int]:
+        """Split the complete messages off the start of buffer.
+
+        The frames, each extended to the next byte boundary, and the number of bytes they occupy
+        are returned. Only the data needed to determine the length of a message is converted, so
+        that splitting does not depend on the amount of data of an incomplete message.
+        """
+        frames = []
+        offset = 0
+        with memoryview(buffer) as data:
+            while True:
+                size = self.__size(data, offset)
+                if size is None or offset + size > len(data):
+                    break
+                frames.append(bytes(data[offset : offset + size]))
+                offset += size
+        return frames, offset
+
+    def frames(self, stream: Iterable[bytes]) -> Iterator[bytes]:
+        """Split a stream of chunks into frames of one message each.
+
+        Each frame is extended to the next byte boundary. Data which does not form a complete
+        message at the end of the stream is discarded.
+        """
+        buffer = bytearray()
+        for chunk in stream:
+            buffer += chunk
+            frames, size = self.split(buffer)
+            del buffer[:size]
+            yield from frames
+
+    def __size(self, data: memoryview, offset: int) -> Optional[int]:
+        """Return the number of bytes of the message at offset or None if more data is needed."""
+        end = min(offset + self.__header, len(data))
+        while True:
+            length = self.length(Bitstring.from_bytes(bytes(data[offset:end])))
+            if not isinstance(length, NeedMore):
+                break
+            assert length.bits is not None
+            if end >= len(data):
+                return None
+            end = min(end + (length.bits + 7) // 8, len(data))
+        self.__header = max(self.__header, end - offset)
+        if length == 0:
+            raise ValueError(f"empty message {self.message.full_name}")
+        return (length + 7) // 8
@@ -0,0 +1,115 @@
+from copy import copy
+from typing import Generator, Optional, Tuple, Union
+
+from rflx.common import generic_repr
+from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.typevalue import MessageValue
+
+
+class NeedMore:
+    """More data is needed to continue parsing.
+
+    The number of missing bits is None if the last field of the message extends to the end of the
+    input, which is signalled by IncrementalParser.finish().
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: Optional[int]) -> None:
+        self.bits = bits
+
+    def __repr__(self) -> str:
+        return generic_repr(self.__class__.__name__, {"bits": self.bits})
+
+
+class Complete:
+    """A message has been parsed from the bits_consumed first bits of the input."""
+
+    __slots__ = ("message", "bits_consumed")
+
+    def __init__(self, message: MessageValue, bits_consumed: int) -> None:
+        self.message = message
+        self.bits_consumed = bits_consumed
+
+    def __repr__(self) -> str:
+        return generic_repr(
+            self.__class__.__name__, {"message": self.message, "bits_consumed": self.bits_consumed},
+        )
+
+
+class IncrementalParser:
+    """Parser for a sequence of messages whose data is received in chunks.
+
+    The data is passed to feed(). Each field is parsed as soon as all of its bits are available,
+    and the position in the message graph is kept between calls, so that no data is parsed twice.
+    Data following a complete message is kept for the next message, which starts at the next byte
+    boundary. As feed() returns after at most one message, it should be called with empty data
+    after each complete message until more data is needed. If the data does not represent a valid
+    message, the error of the parser is raised and all buffered data is discarded.
+    """
+
+    def __init__(self, message: MessageValue, lazy: bool = False) -> None:
+        self.__template = message
+        self.__lazy = lazy
+        self.__buffer = bytearray()
+        self.__message = message
+        self.__parser: Optional[Generator[Tuple[str, int, Optional[int]], Bitstring, None]] = None
+        self.__request: Optional[Tuple[str, int, Optional[int]]] = None
+        self.__position = 0
+        self.__start()
+
+    @property
+    def message(self) -> MessageValue:
+        """Return the message which is currently parsed."""
+        return self.__message
+
+    @property
+    def buffered(self) -> int:
+        """Return the number of buffered bytes which do not belong to a complete message."""
+        return len(self.__buffer)
+
+    def feed(self, chunk: bytes) -> Union[NeedMore, Complete]:
+        self.__buffer += chunk
+        return self.__advance(False)
+
+    def finish(self) -> Union[NeedMore, Complete]:
+        """Signal the end of the input and complete the current message with the buffered data."""
+        return self.__advance(True)
+
+    def reset(self) -> None:
+        """Discard all buffered data and start a new message."""
+        self.__buffer.clear()
+        self.__start()
+
+    def __start(self) -> None:
+        self.__message = copy(self.__template)
+        self.__parser = self.__message.parser(self.__lazy)
+        self.__request = next(self.__parser, None)
+        self.__position = 0
+
+    def __advance(self, final: bool) -> Union[NeedMore, Complete]:
+        assert self.__parser is not None
+        available = len(self.__buffer) * 8
+        while self.__request is not None:
+            _, first, length = self.__request
+            if length is None and not final:
+                return NeedMore(None)
+            last = available if length is None else first + length
+            if max(first, last) > available:
+                return NeedMore(max(first, last) - available)
+            bits = Bitstring.from_bytes(
+                bytes(memoryview(self.__buffer)[first // 8 : (last + 7) // 8])
+            )
+            try:
+                self.__request = self.__parser.send(bits[first % 8 : first % 8 + last - first])
+            except StopIteration:
+                self.__request = None
+            except (IndexError, ValueError, KeyError):
+                self.reset()
+                raise
+            self.__position = last
+
+        result = Complete(self.__message, self.__position)
+        del self.__buffer[: (self.__position + 7) // 8]
+        self.__start()
+        return result
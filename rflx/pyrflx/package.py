@@ -1,14 +1,21 @@
 from copy import copy
-from typing import Dict, Iterator
+from typing import Dict, Iterable, Iterator, Optional, Sequence
 
 from rflx.common import generic_repr
+from rflx.model import Message, Refinement
 from rflx.pyrflx.typevalue import MessageValue
 
 
 class Package:
-    def __init__(self, name: str) -> None:
+    """Messages of a package, whose templates are created on first access."""
+
+    def __init__(
+        self, name: str, models: Iterable[Message] = (), refinements: Sequence[Refinement] = (),
+    ) -> None:
         self.__name = name
-        self.__messages: Dict[str, MessageValue] = {}
+        self.__models = {str(m.name): m for m in models}
+        self.__refinements = refinements
+        self.__messages: Dict[str, Optional[MessageValue]] = dict.fromkeys(self.__models)
 
     @property
     def name(self) -> str:
@@ -18,10 +25,17 @@ class Package:
         return generic_repr(self.__class__.__name__, self.__dict__)
 
     def __getitem__(self, key: str) -> MessageValue:
-        return copy(self.__messages[key])
+        return copy(self.__template(key))
 
     def __setitem__(self, key: str, value: MessageValue) -> None:
         self.__messages[key] = value
 
     def __iter__(self) -> Iterator:
-        return self.__messages.values().__iter__()
+        return (self.__template(key) for key in list(self.__messages))
+
+    def __template(self, key: str) -> MessageValue:
+        message = self.__messages[key]
+        if message is None:
+            message = MessageValue(self.__models[key], self.__refinements)
+            self.__messages[key] = message
+        return message
@@ -0,0 +1,614 @@
+import weakref
+from operator import is_
+from threading import RLock
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from rflx.expression import TRUE, UNDEFINED, Equal, Expr, Name, Number, Or, Variable
+from rflx.model import (
+    FINAL,
+    INITIAL,
+    Array,
+    Composite,
+    Enumeration,
+    Field,
+    Integer,
+    Link,
+    Message,
+    Opaque,
+    RangeInteger,
+    Refinement,
+    Scalar,
+    Type,
+)
+from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.evaluator import Evaluator
+
+
+class ScalarInfo:  # pylint: disable=too-many-instance-attributes
+    """Size, range and literals of a scalar type as Python values, computed once per type."""
+
+    def __init__(self, scalar_type: Scalar) -> None:
+        size = _static_size(scalar_type)
+        assert size is not None
+        self.size = size
+        self.first = 0
+        self.last = 2 ** size - 1
+        self.enumeration = isinstance(scalar_type, Enumeration)
+        self.literals: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.expressions: Dict[Name, Expr] = {}
+        self.always_valid = False
+        self.__unchecked_first: Optional[int] = None
+        self.__unchecked_last: Optional[int] = None
+        if isinstance(scalar_type, Integer):
+            first = scalar_type.first.simplified()
+            last = scalar_type.last.simplified()
+            assert isinstance(first, Number) and isinstance(last, Number)
+            if isinstance(scalar_type, RangeInteger):
+                if first.value != self.first:
+                    self.__unchecked_first = first.value
+                if last.value != self.last:
+                    self.__unchecked_last = last.value
+            self.first = first.value
+            self.last = last.value
+        if isinstance(scalar_type, Enumeration):
+            self.literals = {l: int(v) for l, v in scalar_type.literals.items()}
+            self.names = {v: l for l, v in self.literals.items()}
+            self.expressions = {Variable(l): v for l, v in scalar_type.literals.items()}
+            self.always_valid = scalar_type.always_valid
+
+    def valid(self, value: int) -> bool:
+        if self.enumeration:
+            return value in self.names or self.always_valid
+        return self.first <= value <= self.last
+
+    def in_range(self, value: int, check: bool = True) -> bool:
+        """Return whether a value satisfies the constraints of an integer type.
+
+        Without check, the bounds implied by the size of the type are not checked, in accordance
+        with the constraints of the type.
+        """
+        if check:
+            return self.first <= value <= self.last
+        return (self.__unchecked_first is None or value >= self.__unchecked_first) and (
+            self.__unchecked_last is None or value <= self.__unchecked_last
+        )
+
+    def known(self, value: int) -> bool:
+        """Return False for values of always valid enumerations which do not match any literal."""
+        return not self.enumeration or value in self.names
+
+
+class PlanLink:  # pylint: disable=too-many-instance-attributes
+    """Link with compiled expressions and the first bit and length of its target if constant."""
+
+    def __init__(self, link: Link, literals: Mapping[str, int]) -> None:
+        self.link = link
+        self.source = link.source.name
+        self.target = link.target.name
+        self.condition = Evaluator(link.condition, literals)
+        self.first_evaluator = Evaluator(link.first, literals) if link.first != UNDEFINED else None
+        self.length_evaluator = (
+            Evaluator(link.length, literals) if link.length != UNDEFINED else None
+        )
+        self.unconditional = self.condition({}) is True
+        self.first: Optional[int] = None
+        self.length: Optional[int] = None
+
+
+class PlanStep:  # pylint: disable=too-many-instance-attributes
+    """Parse step for a single field of a message."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        field: Field,
+        field_type: Optional[Type],
+        links: Sequence[PlanLink],
+        incoming: Sequence[PlanLink],
+        condition: Evaluator,
+    ) -> None:
+        self.name = field.name
+        self.type = field_type
+        self.size = _static_size(field_type)
+        self.scalar = scalar_info(field_type) if isinstance(field_type, Scalar) else None
+        self.links = links
+        self.incoming = incoming
+        self.condition = condition
+        self.dispatch: Optional[Dict[Union[int, str], PlanLink]] = None
+
+    @property
+    def successor(self) -> Optional[PlanLink]:
+        """Return the outgoing link if it is taken independent of any field value."""
+        if len(self.links) == 1 and self.links[0].unconditional:
+            return self.links[0]
+        return None
+
+
+class RefinementIndex:
+    """Refinements of the fields of a message, indexed by field and discriminant value.
+
+    If all refinements of a field are conditioned on the equality of the same field with a
+    constant (e.g. `Protocol = IPv4.PROTOCOL_UDP`), the contained message is determined by a
+    single lookup of the value of this field. Otherwise, the conditions of the refinements of the
+    field are evaluated in order. In both cases, the last applicable refinement wins.
+    """
+
+    def __init__(self, plan: "ParsePlan", refinements: Sequence[Refinement]) -> None:
+        self.refinements: Dict[str, List[Tuple[Evaluator, Message]]] = {}
+        self.__dispatch: Dict[str, Tuple[str, Dict[int, Message]]] = {}
+        for ref in refinements:
+            if ref.pdu.name == plan.message.name:
+                self.refinements.setdefault(ref.field.name, []).append(
+                    (plan.evaluator(ref.condition), ref.sdu)
+                )
+        for field, entries in self.refinements.items():
+            dispatch = self.__dispatch_table(plan, entries)
+            if dispatch is not None:
+                self.__dispatch[field] = dispatch
+
+    def refined_message(self, field: str, env: Mapping[str, int]) -> Optional[Message]:
+        """Return the message contained in a field, if a refinement applies."""
+        dispatch = self.__dispatch.get(field)
+        if dispatch is not None:
+            return dispatch[1].get(env[dispatch[0]]) if dispatch[0] in env else None
+        sdu: Optional[Message] = None
+        for condition, message in self.refinements.get(field, []):
+            if condition(env) is True:
+                sdu = message
+        return sdu
+
+    @staticmethod
+    def __dispatch_table(
+        plan: "ParsePlan", entries: Sequence[Tuple[Evaluator, Message]]
+    ) -> Optional[Tuple[str, Dict[int, Message]]]:
+        discriminant = None
+        table: Dict[int, Message] = {}
+        for condition, message in entries:
+            expr = condition.expr.simplified()
+            if not isinstance(expr, Equal):
+                return None
+            for field, value in [(expr.left, expr.right), (expr.right, expr.left)]:
+                if (
+                    isinstance(field, Variable)
+                    and not field.negative
+                    and field.name in plan.steps
+                    and field.name != INITIAL.name
+                    and discriminant in (None, field.name)
+                ):
+                    constant = Evaluator(value, plan.literals)({})
+                    if isinstance(constant, int):
+                        discriminant = field.name
+                        table[constant] = message
+                        break
+            else:
+                return None
+        if discriminant is None:
+            return None
+        return discriminant, table
+
+
+class ParsePlan:  # pylint: disable=too-many-instance-attributes
+    """Parse steps of all fields of a message, computed once per message.
+
+    A plan is not changed after its construction, apart from caches which are filled on first
+    use. As concurrently filled cache entries are equal, a plan can be shared between threads.
+    An unpickled plan is registered for the unpickled message.
+    """
+
+    def __init__(self, message: Message) -> None:
+        self.__message = weakref.ref(message)
+        self.literals = _literal_values(message)
+        self.steps: Dict[str, PlanStep] = {}
+        self.index = {f.name: i for i, f in enumerate(message.all_fields)}
+        self.__enum_literals = _literals(message)
+        self.__evaluators: Dict[int, Tuple[Expr, Evaluator]] = {}
+        self.__dependencies: Dict[FrozenSet[str], Set[str]] = {}
+        self.__refinement_indices: Dict[
+            Tuple[int, ...], Tuple[Tuple["weakref.ref[Refinement]", ...], RefinementIndex]
+        ] = {}
+
+        links = {id(l): PlanLink(l, self.literals) for l in message.structure}
+
+        for field in (INITIAL, *message.fields):
+            step = PlanStep(
+                field,
+                message.types[field] if field != INITIAL else None,
+                [links[id(l)] for l in message.outgoing(field)],
+                [links[id(l)] for l in message.incoming(field)],
+                Evaluator(
+                    message.field_condition(field) if message.fields else TRUE, self.literals
+                ),
+            )
+            step.dispatch = self.__dispatch_table(step)
+            self.steps[field.name] = step
+
+        self.links = list(links.values())
+        self.composite_fields = [
+            f.name for f in message.fields if isinstance(message.types[f], Composite)
+        ]
+
+        static = {f"{INITIAL.name}'First": 0, f"{INITIAL.name}'Length": 0}
+
+        for field in (*message.fields, FINAL):
+            incoming = [links[id(l)] for l in message.incoming(field)]
+            for link in incoming:
+                link.first = self.__static_first(link, static)
+                link.length = (
+                    self.__static_length(link, message.types[field], static)
+                    if field != FINAL
+                    else 0
+                )
+            first = _unique(l.first for l in incoming)
+            length = _unique(l.length for l in incoming)
+            if first is not None:
+                static[f"{field.name}'First"] = first
+            if length is not None:
+                static[f"{field.name}'Length"] = length
+            if first is not None and length is not None:
+                static[f"{field.name}'Last"] = first + length - 1
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_ParsePlan__message"] = self.message
+        state["_ParsePlan__refinement_indices"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        message = state["_ParsePlan__message"]
+        self.__dict__.update(state)
+        self.__message = weakref.ref(message)
+        self.__evaluators = {id(e[0]): e for e in self.__evaluators.values()}
+        with _LOCK:
+            if id(message) not in _PLANS:
+                _register(_PLANS, message, self)
+
+    @property
+    def message(self) -> Message:
+        message = self.__message()
+        assert message is not None
+        return message
+
+    @property
+    def initial(self) -> PlanStep:
+        return self.steps[INITIAL.name]
+
+    def dependencies(self, fields: Iterable[str]) -> Set[str]:
+        """Return all fields whose values are needed to locate and validate the given fields."""
+        key = frozenset(fields)
+        if key in self.__dependencies:
+            return self.__dependencies[key]
+        last = max(self.index[f] for f in key)
+        names: Set[str] = set()
+        for link in self.links:
+            if self.index[link.source] <= last:
+                names |= link.condition.names
+            if self.index[link.target] <= last:
+                for evaluator in [link.first_evaluator, link.length_evaluator]:
+                    if evaluator is not None:
+                        names |= evaluator.names
+        dependencies = {n for n in names if n in self.steps and n != INITIAL.name}
+        self.__dependencies[key] = dependencies
+        return dependencies
+
+    def evaluator(self, expr: Expr) -> Evaluator:
+        """Return the compiled expression, compiling it on first use."""
+        entry = self.__evaluators.get(id(expr))
+        if entry is None or entry[0] is not expr:
+            entry = (expr, Evaluator(expr, self.literals))
+            self.__evaluators[id(expr)] = entry
+        return entry[1]
+
+    def walk(
+        self, data: Bitstring, env: Dict[str, int]
+    ) -> Generator[Tuple[PlanStep, int, Bitstring], None, Tuple[bool, Optional[str], int]]:
+        """Locate the fields of a message in data without creating any field values.
+
+        The values of scalar fields as well as the first bit, length and last bit of all fields
+        are added to env. Each located field is yielded together with its first bit and its bits,
+        so that the caller can stop as soon as it is not interested in further fields. The values
+        of composite fields are not checked. The result consists of the verdict, the first invalid
+        field and its first bit. For a valid message, the number of bits used by the message is
+        returned instead.
+        """
+        step = self.initial
+        link = step.successor
+        first = 0
+        position = 0
+
+        while link is not None and link.target != FINAL.name:
+            step = self.steps[link.target]
+            first_value = link.first
+            if first_value is None:
+                first_value = (
+                    link.first_evaluator(env) if link.first_evaluator is not None else position
+                )
+                if first_value is None:
+                    return False, step.name, position
+            first = first_value
+            length = link.length
+            if length is None and link.length_evaluator is not None:
+                length = link.length_evaluator(env)
+            if length is None:
+                if not isinstance(step.type, Opaque):
+                    return False, step.name, first
+                length = len(data) - first
+            if first < 0 or length < 0 or first + length > len(data):
+                return False, step.name, first
+
+            value = data[first : first + length]
+            if step.scalar is not None:
+                number = int(value)
+                if not step.scalar.valid(number):
+                    return False, step.name, first
+                if step.scalar.known(number):
+                    env[step.name] = number
+            env[f"{step.name}'First"] = first
+            env[f"{step.name}'Length"] = length
+            env[f"{step.name}'Last"] = first + length - 1
+
+            yield step, first, value
+
+            link = self.next_link(step, env)
+            position = first + length
+
+        if link is None:
+            return False, step.name if step is not self.initial else None, first
+        return True, None, position
+
+    def validate(
+        self, data: Bitstring, refinements: Sequence[Refinement]
+    ) -> Tuple[bool, Optional[str], int]:
+        """Check if data represents a valid message without creating any field values.
+
+        The result consists of the verdict, the first invalid field and its first bit. For a valid
+        message, the number of bits used by the message is returned instead. Invalid fields inside
+        of nested messages are denoted by their qualified name (e.g. "Payload.Length").
+        """
+        env: Dict[str, int] = {}
+        fields = self.walk(data, env)
+        while True:
+            try:
+                step, first, value = next(fields)
+            except StopIteration as result:
+                return result.value
+            error = self.__validate_composite(step, value, env, refinements)
+            if error is not None:
+                return False, error[0], first + error[1]
+
+    def valid_value(
+        self,
+        step: PlanStep,
+        value: Bitstring,
+        env: Mapping[str, int],
+        refinements: Sequence[Refinement],
+    ) -> bool:
+        """Check if the bits of a field represent a valid value without creating the value."""
+        if step.scalar is not None:
+            return step.scalar.valid(int(value))
+        return self.__validate_composite(step, value, env, refinements) is None
+
+    def refinement_index(self, refinements: Sequence[Refinement]) -> RefinementIndex:
+        """Return the index of the refinements of the message, creating it on first use."""
+        key = tuple(map(id, refinements))
+        entry = self.__refinement_indices.get(key)
+        if entry is None or not all(map(is_, (r() for r in entry[0]), refinements)):
+            entry = (tuple(map(weakref.ref, refinements)), RefinementIndex(self, refinements))
+            if refinements:
+                self.__refinement_indices[key] = entry
+        return entry[1]
+
+    def refined_message(
+        self, field: str, env: Mapping[str, int], refinements: Sequence[Refinement]
+    ) -> Optional[Message]:
+        """Return the message contained in a field, if a refinement applies."""
+        return self.refinement_index(refinements).refined_message(field, env)
+
+    def __validate_composite(
+        self,
+        step: PlanStep,
+        value: Bitstring,
+        env: Mapping[str, int],
+        refinements: Sequence[Refinement],
+    ) -> Optional[Tuple[str, int]]:
+        if isinstance(step.type, Opaque):
+            sdu = self.refined_message(step.name, env, refinements)
+            if sdu is not None:
+                valid, field, position = parse_plan(sdu).validate(value, refinements)
+                if not valid:
+                    return _qualified_name(step.name, field), position
+            return None
+
+        if isinstance(step.type, Array):
+            element_type = step.type.element_type
+            if isinstance(element_type, Message):
+                plan = parse_plan(element_type)
+                position = 0
+                while position < len(value):
+                    valid, field, used = plan.validate(value[position:], [])
+                    if not valid or used == 0:
+                        return _qualified_name(step.name, field), position + used
+                    position += used
+            elif isinstance(element_type, Scalar):
+                element = scalar_info(element_type)
+                for position in range(0, len(value), element.size):
+                    element_value = value[position : min(position + element.size, len(value))]
+                    if not element.valid(int(element_value)):
+                        return step.name, position
+
+        return None
+
+    def condition_values(self, step: PlanStep) -> Optional[Set[int]]:
+        """Return the values of a scalar field which satisfy the condition of any outgoing link.
+
+        None is returned if any condition is not a comparison of the field with constants.
+        """
+        if step.scalar is None or not step.links:
+            return None
+        values: Set[int] = set()
+        for link in step.links:
+            compared = self.__compared_values(step, link.link.condition.simplified())
+            if compared is None:
+                return None
+            values.update(step.scalar.literals[v] if isinstance(v, str) else v for v in compared)
+        return values
+
+    @staticmethod
+    def next_link(step: PlanStep, env: Mapping[str, int]) -> Optional[PlanLink]:
+        """Return the outgoing link of a field whose condition is true for the given values."""
+        if step.successor is not None:
+            return step.successor
+        if step.dispatch is not None and step.scalar is not None and step.name in env:
+            value = env[step.name]
+            link = step.dispatch.get(step.scalar.names[value] if step.scalar.enumeration else value)
+            if link is not None:
+                return link
+        for link in step.links:
+            if link.condition(env) is True:
+                return link
+        return None
+
+    @staticmethod
+    def __static_first(link: PlanLink, static: Mapping[str, int]) -> Optional[int]:
+        if link.first_evaluator is not None:
+            return link.first_evaluator(static)
+        source_first = static.get(f"{link.source}'First")
+        source_length = static.get(f"{link.source}'Length")
+        if source_first is None or source_length is None:
+            return None
+        return source_first + source_length
+
+    @staticmethod
+    def __static_length(
+        link: PlanLink, field_type: Type, static: Mapping[str, int]
+    ) -> Optional[int]:
+        if isinstance(field_type, Scalar):
+            return _static_size(field_type)
+        if isinstance(field_type, Composite) and link.length_evaluator is not None:
+            return link.length_evaluator(static)
+        return None
+
+    def __dispatch_table(self, step: PlanStep) -> Optional[Dict[Union[int, str], PlanLink]]:
+        """Map field values to outgoing links, if all conditions compare the field to constants."""
+        if len(step.links) < 2 or not isinstance(step.type, Scalar):
+            return None
+        table: Dict[Union[int, str], PlanLink] = {}
+        for link in step.links:
+            values = self.__compared_values(step, link.link.condition.simplified())
+            if values is None:
+                return None
+            for v in values:
+                table.setdefault(v, link)
+        return table
+
+    def __compared_values(self, step: PlanStep, condition: Expr) -> Optional[List[Union[int, str]]]:
+        """Return the values of the field which satisfy a condition of the form `Field = Value`."""
+        if isinstance(condition, Or):
+            values: List[Union[int, str]] = []
+            for term in condition.terms:
+                term_values = self.__compared_values(step, term)
+                if term_values is None:
+                    return None
+                values.extend(term_values)
+            return values
+        if not isinstance(condition, Equal):
+            return None
+        for field, value in [(condition.left, condition.right), (condition.right, condition.left)]:
+            if not isinstance(field, Variable) or field.negative or field.name != step.name:
+                continue
+            if isinstance(step.type, Enumeration) and isinstance(value, Variable):
+                literal = self.__enum_literals.get(value.name)
+                if literal is not None and literal[0] is step.type:
+                    return [literal[1]]
+            if not isinstance(step.type, Enumeration) and isinstance(value, Number):
+                return [value.value]
+        return None
+
+
+def _static_size(field_type: Optional[Type]) -> Optional[int]:
+    if isinstance(field_type, Scalar):
+        size = field_type.size.simplified()
+        if isinstance(size, Number):
+            return size.value
+    return None
+
+
+def _qualified_name(name: str, nested_name: Optional[str]) -> str:
+    return f"{name}.{nested_name}" if nested_name else name
+
+
+def _unique(values: Iterable[Optional[int]]) -> Optional[int]:
+    distinct = set(values)
+    return distinct.pop() if len(distinct) == 1 else None
+
+
+def _literals(message: Message) -> Dict[str, Tuple[Enumeration, str]]:
+    """Return the enumeration type and the unqualified name of all literals usable in a message."""
+    literals: Dict[str, Tuple[Enumeration, str]] = {}
+    for t in message.types.values():
+        if isinstance(t, Enumeration):
+            for l in t.literals:
+                literals[l] = (t, l)
+                literals[f"{t.package}.{l}"] = (t, l)
+    return literals
+
+
+def _literal_values(message: Message) -> Dict[str, int]:
+    """Return the values of all literals usable in a message."""
+    values: Dict[str, int] = {}
+    for name, (enum, literal) in _literals(message).items():
+        value = enum.literals[literal]
+        assert isinstance(value, Number)
+        values[name] = value.value
+    return values
+
+
+_LOCK = RLock()
+
+_SCALARS: Dict[int, ScalarInfo] = {}
+
+
+def scalar_info(scalar_type: Scalar) -> ScalarInfo:
+    """Return the properties of a scalar type, computing them on first use."""
+    info = _SCALARS.get(id(scalar_type))
+    if info is None:
+        with _LOCK:
+            info = _SCALARS.get(id(scalar_type))
+            if info is None:
+                info = ScalarInfo(scalar_type)
+                _register(_SCALARS, scalar_type, info)
+    return info
+
+
+_PLANS: Dict[int, ParsePlan] = {}
+
+
+def parse_plan(message: Message) -> ParsePlan:
+    """Return the parse plan of a message, creating it on first use."""
+    plan = _PLANS.get(id(message))
+    if plan is None:
+        with _LOCK:
+            plan = _PLANS.get(id(message))
+            if plan is None:
+                plan = ParsePlan(message)
+                _register(_PLANS, message, plan)
+    return plan
+
+
+def _register(registry: Dict[int, Any], key: object, value: object) -> None:
+    """Add a value to a registry for the lifetime of the key object."""
+    registry[id(key)] = value
+    weakref.finalize(key, registry.pop, id(key), None).atexit = False
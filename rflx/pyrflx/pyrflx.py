@@ -1,9 +1,10 @@
 import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
-from rflx.parser import Parser
-from rflx.pyrflx.typevalue import MessageValue
+from rflx.model import Message
+from rflx.parser import ModelCache, Parser
+from rflx.pyrflx.classifier import Classifier
 
 from .package import Package
 
@@ -11,20 +12,53 @@ log = logging.getLogger(__name__)
 
 
 class PyRFLX:
-    def __init__(self, files: List[str]) -> None:
-        parser = Parser()
+    """Messages of all packages specified in the given files.
+
+    If packages are given, only the files of these packages and the packages they depend on are
+    loaded. The packages and the templates of their messages are created on first access. Unless
+    cache is False, the verified model is loaded from or stored in the model cache.
+    """
+
+    def __init__(
+        self, files: List[str], packages: Iterable[str] = None, cache: bool = True
+    ) -> None:
         self.__packages: Dict[str, Package] = {}
 
         for f in files:
             if not Path(f).is_file():
                 raise FileNotFoundError(f'file not found: "{f}"')
-            parser.parse(Path(f))
-        model = parser.create_model()
-        packages = set(str(m.package) for m in model.messages)
-        for p in packages:
-            self.__packages[p] = Package(p)
-            for m in [x for x in model.messages if str(x.package) == p]:
-                self.__packages[p][str(m.name)] = MessageValue(m, model.refinements)
+
+        if packages is not None:
+            selected = {p.lower(): p for p in packages}
+            for name, package in selected.items():
+                if not any(Path(f).stem == name for f in files):
+                    raise ValueError(f'package not found: "{package}"')
+            files = [f for f in files if Path(f).stem in selected]
+
+        if cache:
+            model = ModelCache().create_model([Path(f) for f in files])
+        else:
+            parser = Parser()
+            for f in files:
+                parser.parse(Path(f))
+            model = parser.create_model()
+        self.__model = model
+        self.__refinements = model.refinements
+        self.__messages: Dict[str, List[Message]] = {}
+        for m in model.messages:
+            self.__messages.setdefault(str(m.package), []).append(m)
 
     def __getitem__(self, key: str) -> Package:
+        if key not in self.__packages:
+            self.__packages[key] = Package(key, self.__messages[key], self.__refinements)
         return self.__packages[key]
+
+    def classifier(self, messages: Iterable[str]) -> Classifier:
+        """Return a classifier for the messages with the given qualified names."""
+        models = {m.full_name: m for m in self.__model.messages}
+        candidates = []
+        for name in messages:
+            if name not in models:
+                raise KeyError(f"unknown message {name}")
+            candidates.append(models[name])
+        return Classifier(candidates, self.__refinements)
@@ -0,0 +1,270 @@
+import asyncio
+from abc import abstractmethod
+from collections import deque
+from copy import copy
+from typing import Any, Deque, Generic, List, Optional, Tuple, TypeVar
+
+from rflx.pyrflx.framing import Framer
+from rflx.pyrflx.incremental import Complete, IncrementalParser, NeedMore
+from rflx.pyrflx.typevalue import MessageValue
+
+T = TypeVar("T")
+
+
+class _Queue(Generic[T]):
+    """Bounded queue of received items, which is closed at the end of a connection."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.__items: Deque[T] = deque()
+        self.__waiter: Optional["asyncio.Future[None]"] = None
+        self.__closed = False
+        self.__error: Optional[Exception] = None
+
+    @property
+    def full(self) -> bool:
+        return len(self.__items) >= self.maxsize
+
+    def put(self, item: T) -> None:
+        self.__items.append(item)
+        self.__wake()
+
+    def close(self, error: Exception = None) -> None:
+        if not self.__closed:
+            self.__closed = True
+            self.__error = error
+        self.__wake()
+
+    async def get(self) -> T:
+        while not self.__items:
+            if self.__error is not None:
+                raise self.__error
+            if self.__closed:
+                raise EOFError("connection closed")
+            self.__waiter = asyncio.get_event_loop().create_future()
+            try:
+                await self.__waiter
+            finally:
+                self.__waiter = None
+        return self.__items.popleft()
+
+    def __wake(self) -> None:
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(None)
+
+
+class _StreamProtocol(asyncio.Protocol, Generic[T]):
+    """Protocol which splits a byte stream into items.
+
+    Received items are queued until they are retrieved by get() or by asynchronous iteration. If
+    max_items items are queued, reading from the transport is paused until items are retrieved.
+    If more than max_buffer bytes of an incomplete item are buffered, or if the received data is
+    invalid, the connection is closed and the error is raised by get() after all previously
+    received items have been retrieved.
+    """
+
+    def __init__(self, max_items: int = 64, max_buffer: int = 2 ** 16) -> None:
+        self.__queue: _Queue[T] = _Queue(max_items)
+        self.__max_buffer = max_buffer
+        self.__transport: Optional[asyncio.BaseTransport] = None
+        self.__paused = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.__transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            for item in self._received(data):
+                self.__queue.put(item)
+            if self._buffered > self.__max_buffer:
+                raise BufferError(f"buffered data exceeds {self.__max_buffer} bytes")
+        except (BufferError, IndexError, ValueError, KeyError) as e:
+            self.__queue.close(e)
+            assert self.__transport is not None
+            self.__transport.close()
+            return
+        if self.__queue.full and not self.__paused:
+            assert isinstance(self.__transport, asyncio.ReadTransport)
+            self.__transport.pause_reading()
+            self.__paused = True
+
+    def eof_received(self) -> bool:
+        try:
+            for item in self._finished():
+                self.__queue.put(item)
+        except (IndexError, ValueError, KeyError) as e:
+            self.__queue.close(e)
+        return False
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.__queue.close(exc)
+
+    async def get(self) -> T:
+        """Return the next item, waiting until it is received.
+
+        EOFError is raised if the connection is closed and all items have been retrieved.
+        """
+        item = await self.__queue.get()
+        if self.__paused and not self.__queue.full:
+            assert isinstance(self.__transport, asyncio.ReadTransport)
+            self.__transport.resume_reading()
+            self.__paused = False
+        return item
+
+    def __aiter__(self) -> "_StreamProtocol[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        try:
+            return await self.get()
+        except EOFError:
+            raise StopAsyncIteration
+
+    @property
+    @abstractmethod
+    def _buffered(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _received(self, data: bytes) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _finished(self) -> List[T]:
+        raise NotImplementedError
+
+
+class MessageStreamProtocol(_StreamProtocol[MessageValue]):
+    """Protocol which parses a byte stream into messages of the type of the given message."""
+
+    def __init__(
+        self,
+        message: MessageValue,
+        lazy: bool = False,
+        max_items: int = 64,
+        max_buffer: int = 2 ** 16,
+    ) -> None:
+        super().__init__(max_items, max_buffer)
+        self.__parser = IncrementalParser(message, lazy)
+
+    @property
+    def _buffered(self) -> int:
+        return self.__parser.buffered
+
+    def _received(self, data: bytes) -> List[MessageValue]:
+        messages = []
+        result = self.__parser.feed(data)
+        while isinstance(result, Complete):
+            messages.append(result.message)
+            result = self.__parser.feed(b"")
+        return messages
+
+    def _finished(self) -> List[MessageValue]:
+        if self.__parser.buffered == 0:
+            return []
+        result = self.__parser.finish()
+        if isinstance(result, NeedMore):
+            raise ValueError("incomplete message at end of stream")
+        return [result.message]
+
+
+class FrameStreamProtocol(_StreamProtocol[bytes]):
+    """Protocol which splits a byte stream into the raw data of messages without parsing them."""
+
+    def __init__(self, framer: Framer, max_items: int = 64, max_buffer: int = 2 ** 16) -> None:
+        super().__init__(max_items, max_buffer)
+        self.__framer = framer
+        self.__buffer = bytearray()
+
+    @property
+    def _buffered(self) -> int:
+        return len(self.__buffer)
+
+    def _received(self, data: bytes) -> List[bytes]:
+        self.__buffer += data
+        frames, size = self.__framer.split(self.__buffer)
+        del self.__buffer[:size]
+        return frames
+
+    def _finished(self) -> List[bytes]:
+        if self.__buffer:
+            raise ValueError("incomplete message at end of stream")
+        return []
+
+
+class MessageDatagramProtocol(asyncio.DatagramProtocol):
+    """Protocol which parses each received datagram into a message of the given type.
+
+    Parsed messages are queued together with the address of the sender until they are retrieved
+    by get(). As reading from a datagram transport cannot be paused, datagrams are dropped if
+    max_items messages are queued. Datagrams which do not contain a valid message are dropped as
+    well. The numbers of dropped datagrams and of transmission errors are counted.
+    """
+
+    def __init__(self, message: MessageValue, lazy: bool = False, max_items: int = 64) -> None:
+        self.__message = message
+        self.__lazy = lazy
+        self.__queue: _Queue[Tuple[MessageValue, Any]] = _Queue(max_items)
+        self.dropped = 0
+        self.invalid = 0
+        self.errors = 0
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        if self.__queue.full:
+            self.dropped += 1
+            return
+        message = copy(self.__message)
+        try:
+            message.parse(data, self.__lazy)
+        except (IndexError, ValueError, KeyError):
+            self.invalid += 1
+            return
+        if not message.valid_message:
+            self.invalid += 1
+            return
+        self.__queue.put((message, addr))
+
+    def error_received(self, exc: Exception) -> None:
+        self.errors += 1
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.__queue.close(exc)
+
+    async def get(self) -> Tuple[MessageValue, Any]:
+        """Return the next message and the address of its sender, waiting until it is received.
+
+        EOFError is raised if the transport is closed and all messages have been retrieved.
+        """
+        return await self.__queue.get()
+
+
+async def read_message(reader: asyncio.StreamReader, parser: IncrementalParser) -> MessageValue:
+    """Read a message from a stream, reading no data beyond the end of the message.
+
+    A message whose last field extends to the end of the stream is completed at end of file.
+    IncompleteReadError is raised if the stream ends within a message.
+    """
+    result = parser.feed(b"")
+    while isinstance(result, NeedMore):
+        if result.bits is None:
+            parser.feed(await reader.read())
+            result = parser.finish()
+            if isinstance(result, NeedMore):
+                raise asyncio.IncompleteReadError(b"", None)
+        else:
+            result = parser.feed(await reader.readexactly((result.bits + 7) // 8))
+    return result.message
+
+
+async def read_frame(reader: asyncio.StreamReader, framer: Framer) -> bytes:
+    """Read the raw data of a message from a stream, reading no data beyond the end of the message.
+
+    IncompleteReadError is raised if the stream ends within a message.
+    """
+    data = b""
+    length = framer.length(data)
+    while isinstance(length, NeedMore):
+        assert length.bits is not None
+        data += await reader.readexactly((length.bits + 7) // 8)
+        length = framer.length(data)
+    return data + await reader.readexactly((length + 7) // 8 - len(data))
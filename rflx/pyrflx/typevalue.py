@@ -1,21 +1,27 @@
+# pylint: disable=too-many-lines
+import sys
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from array import array
+from copy import copy
+from functools import lru_cache
+from threading import RLock
+from weakref import WeakValueDictionary
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    List,
+    Mapping,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from rflx.common import generic_repr
-from rflx.expression import (
-    FALSE,
-    TRUE,
-    UNDEFINED,
-    Add,
-    And,
-    Expr,
-    First,
-    Last,
-    Length,
-    Name,
-    Sub,
-    Variable,
-)
+from rflx.expression import UNDEFINED, Add, Expr, Name, Sub, Variable
 from rflx.identifier import ID
 from rflx.model import (
     FINAL,
@@ -32,7 +38,11 @@ from rflx.model import (
     Scalar,
     Type,
 )
-from rflx.pyrflx.bitstring import Bitstring
+from rflx.pyrflx.bitstring import Bitstring, BitWriter
+from rflx.pyrflx.plan import ParsePlan, PlanLink, PlanStep, parse_plan, scalar_info
+
+_INITIAL = INITIAL.name
+_FINAL = FINAL.name
 
 
 class NotInitializedError(Exception):
@@ -41,13 +51,17 @@ class NotInitializedError(Exception):
 
 class TypeValue(ABC):
 
-    _value: Any = None
+    __slots__ = ("_type", "_value", "_owner")
+
+    _value: Any
 
     def __init__(self, vtype: Type) -> None:
         self._type = vtype
+        self._value = None
+        self._owner: Optional[TypeValue] = None
 
     def __repr__(self) -> str:
-        return generic_repr(self.__class__.__name__, self.__dict__)
+        return generic_repr(self.__class__.__name__, self._attributes())
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, self.__class__):
@@ -80,6 +94,29 @@ class TypeValue(ABC):
     def clear(self) -> None:
         self._value = None
 
+    def reset(self) -> None:
+        """Clear the value and keep the objects of nested values for reuse."""
+        self.clear()
+
+    def clone(self) -> "TypeValue":
+        """Return a copy of the value which shares the type and all immutable data."""
+        value = object.__new__(self.__class__)
+        for name in _slots(self.__class__):
+            setattr(value, name, getattr(self, name))
+        return value
+
+    def _attributes(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _slots(self.__class__) if name != "_owner"}
+
+    def _modified(self) -> None:
+        """Notify the value containing this value of a change of this value."""
+        if self._owner is not None:
+            self._owner._nested_modified(self)  # pylint: disable=protected-access
+
+    def _nested_modified(self, value: "TypeValue") -> None:  # pylint: disable=unused-argument
+        """Handle an in-place change of a value contained in this value."""
+        self._modified()
+
     @abstractmethod
     def assign(self, value: Any, check: bool = True) -> None:
         raise NotImplementedError
@@ -125,10 +162,17 @@ class TypeValue(ABC):
 
 class ScalarValue(TypeValue):
 
+    __slots__ = ("_info",)
+
     _type: Scalar
 
     def __init__(self, vtype: Scalar) -> None:
         super().__init__(vtype)
+        self._info = scalar_info(vtype)
+
+    def clear(self) -> None:
+        super().clear()
+        self._modified()
 
     @property
     @abstractmethod
@@ -137,13 +181,17 @@ class ScalarValue(TypeValue):
 
     @property
     def size(self) -> Number:
-        size_expr = self._type.size.simplified()
-        assert isinstance(size_expr, Number)
-        return size_expr
+        return Number(self._info.size)
+
+    @abstractmethod
+    def _parse_int(self, value: int) -> None:
+        raise NotImplementedError
 
 
 class IntegerValue(ScalarValue):
 
+    __slots__ = ()
+
     _value: int
     _type: Integer
 
@@ -152,32 +200,25 @@ class IntegerValue(ScalarValue):
 
     @property
     def _first(self) -> int:
-        first = self._type.first.simplified()
-        assert isinstance(first, Number)
-        return first.value
+        return self._info.first
 
     @property
     def _last(self) -> int:
-        last = self._type.last.simplified()
-        assert isinstance(last, Number)
-        return last.value
+        return self._info.last
 
     def assign(self, value: int, check: bool = True) -> None:
-        if (
-            And(*self._type.constraints("__VALUE__", check))
-            .substituted(
-                mapping={Variable("__VALUE__"): Number(value), Length("__VALUE__"): self._type.size}
-            )
-            .simplified()
-            != TRUE
-        ):
+        if not self._info.in_range(value, check):
             raise ValueError(f"value {value} not in type range {self._first} .. {self._last}")
         self._value = value
+        self._modified()
 
     def parse(self, value: Union[Bitstring, bytes]) -> None:
         if isinstance(value, bytes):
             value = Bitstring.from_bytes(value)
-        self.assign(int(value))
+        self._parse_int(int(value))
+
+    def _parse_int(self, value: int) -> None:
+        self.assign(value)
 
     @property
     def expr(self) -> Number:
@@ -192,7 +233,7 @@ class IntegerValue(ScalarValue):
     @property
     def bitstring(self) -> Bitstring:
         self._raise_initialized()
-        return Bitstring(format(self._value, f"0{self.size}b"))
+        return Bitstring.from_int(self._value, self._info.size)
 
     @property
     def accepted_type(self) -> type:
@@ -201,43 +242,35 @@ class IntegerValue(ScalarValue):
 
 class EnumValue(ScalarValue):
 
-    _value: Tuple[str, Number]
+    __slots__ = ()
+
+    _value: Tuple[str, int]
     _type: Enumeration
 
     def __init__(self, vtype: Enumeration) -> None:
         super().__init__(vtype)
 
     def assign(self, value: str, check: bool = True) -> None:
-        if value not in self._type.literals:
+        if value not in self._info.literals:
             raise KeyError(f"{value} is not a valid enum value")
-        r = (
-            And(*self._type.constraints("__VALUE__", check))
-            .substituted(
-                mapping={
-                    **{Variable(k): v for k, v in self._type.literals.items()},
-                    **{Variable("__VALUE__"): self._type.literals[value]},
-                    **{Length("__VALUE__"): self._type.size},
-                }
-            )
-            .simplified()
-        )
-        assert r == TRUE
-        self._value = value, self._type.literals[value]
+        self._value = value, self._info.literals[value]
+        self._modified()
 
     def parse(self, value: Union[Bitstring, bytes]) -> None:
         if isinstance(value, bytes):
             value = Bitstring.from_bytes(value)
-        value_as_number = Number(int(value))
-        if value_as_number not in self.literals.values():
+        self._parse_int(int(value))
+
+    def _parse_int(self, value: int) -> None:
+        name = self._info.names.get(value)
+        if name is None:
             if self._type.always_valid:
-                self._value = "UNKNOWN", value_as_number
+                self._value = "UNKNOWN", value
             else:
-                raise KeyError(f"Number {value_as_number.value} is not a valid enum value")
+                raise KeyError(f"Number {value} is not a valid enum value")
         else:
-            for k, v in self.literals.items():
-                if v == value_as_number:
-                    assert isinstance(v, Number)
-                    self._value = str(k), v
+            self._value = name, value
+        self._modified()
 
     @property
     def value(self) -> str:
@@ -252,7 +285,7 @@ class EnumValue(ScalarValue):
     @property
     def bitstring(self) -> Bitstring:
         self._raise_initialized()
-        return Bitstring(format(self._value[1].value, f"0{self.size}b"))
+        return Bitstring.from_int(self._value[1], self._info.size)
 
     @property
     def accepted_type(self) -> type:
@@ -260,17 +293,28 @@ class EnumValue(ScalarValue):
 
     @property
     def literals(self) -> Mapping[Name, Expr]:
-        return {Variable(k): v for k, v in self._type.literals.items()}
+        return self._info.expressions
 
 
 class CompositeValue(TypeValue):
+
+    __slots__ = ("_expected_size",)
+
     def __init__(self, vtype: Composite) -> None:
         self._expected_size: Optional[Expr] = None
         super().__init__(vtype)
 
-    def set_expected_size(self, expected_size: Expr) -> None:
+    @property
+    def expected_size(self) -> Optional[Expr]:
+        return self._expected_size
+
+    def set_expected_size(self, expected_size: Optional[Expr]) -> None:
         self._expected_size = expected_size
 
+    def _nested_valid(self) -> bool:
+        """Return True if all nested messages are valid and the value has the expected size."""
+        return True
+
     def _check_length_of_assigned_value(
         self, value: Union[bytes, Bitstring, List[TypeValue]]
     ) -> None:
@@ -298,69 +342,189 @@ class CompositeValue(TypeValue):
         raise NotImplementedError
 
 
-class OpaqueValue(CompositeValue):
+class OpaqueValue(CompositeValue):  # pylint: disable=too-many-instance-attributes
+    """Opaque value, possibly containing a nested message.
+
+    If a refinement applies, the value is only validated on parsing and kept as a view on the
+    parsed data. The nested message is parsed on first access. The value is serialized from the
+    nested message only if the nested message has been changed.
+    """
 
-    _value: bytes
-    _nested_message: Optional["MessageValue"] = None
+    __slots__ = (
+        "_nested_message",
+        "_refinement_message",
+        "_all_refinements",
+        "_pool",
+        "_bits",
+        "_nested_changed",
+    )
+
+    _value: Optional[bytes]
 
     def __init__(self, vtype: Opaque) -> None:
         super().__init__(vtype)
+        self._nested_message: Optional[MessageValue] = None
         self._refinement_message: Optional[Message] = None
         self._all_refinements: Sequence[Refinement] = []
+        self._pool: Optional[MessageValue] = None
+        self._bits: Optional[Bitstring] = None
+        self._nested_changed = False
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, OpaqueValue):
+            return (self.value if self.initialized else None) == (
+                other.value if other.initialized else None
+            ) and self._type == other._type
+        return NotImplemented
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not None or self._bits is not None
+
+    def clear(self) -> None:
+        self._value = None
+        self._bits = None
+
+    def reset(self) -> None:
+        if self._nested_message is not None:
+            self._pool = self._nested_message
+            self._nested_message = None
+        self._refinement_message = None
+        self.clear()
 
     def assign(self, value: bytes, check: bool = True) -> None:
         self.parse(value)
 
     def parse(self, value: Union[Bitstring, bytes]) -> None:
         self._check_length_of_assigned_value(value)
+        self._nested_message = None
+        self._nested_changed = False
         if self._refinement_message is not None:
-            nested_msg = MessageValue(self._refinement_message, self._all_refinements)
-            try:
-                nested_msg.parse(value)
-            except (IndexError, ValueError, KeyError) as e:
-                raise ValueError(
-                    f"Error while parsing nested message "
-                    f"{self._refinement_message.identifier}: {e}"
-                )
-            assert nested_msg.valid_message
-            self._nested_message = nested_msg
-            self._value = nested_msg.bytestring
+            bits = Bitstring.from_bytes(value) if isinstance(value, bytes) else value
+            valid, _, used = parse_plan(self._refinement_message).validate(
+                bits, self._all_refinements
+            )
+            self._value = None
+            if valid and used == len(bits):
+                self._bits = bits
+            else:
+                self._bits = None
+                self.__parse_nested_message(bits)
         else:
             self._value = bytes(value)
+            self._bits = None
+
+    def __parse_nested_message(self, value: Bitstring) -> None:
+        # pylint: disable=protected-access
+        assert self._refinement_message is not None
+        nested_msg = self.__reused_message(self._refinement_message)
+        try:
+            nested_msg.parse(value)
+        except (IndexError, ValueError, KeyError) as e:
+            raise ValueError(
+                f"Error while parsing nested message " f"{self._refinement_message.identifier}: {e}"
+            )
+        assert nested_msg.valid_message
+        nested_msg._owner = self
+        self._nested_message = nested_msg
+        self._nested_changed = False
+        if self._bits is None:
+            self._value = nested_msg.bytestring
+
+    def __reused_message(self, model: Message) -> "MessageValue":
+        # pylint: disable=protected-access
+        pool = self._pool
+        self._pool = None
+        if pool is not None and pool.equal_type(model):
+            pool._owner = None
+            pool.reset()
+            return pool
+        return _nested_schema(self._owner, model, self._all_refinements).new_message()
+
+    def __update(self) -> None:
+        """Serialize the nested message, if it has been changed since it was parsed."""
+        nested_msg = self._nested_message
+        if nested_msg is not None and self._nested_changed:
+            self._value = nested_msg.bytestring
+            self._bits = None
+            self._nested_changed = False
+
+    def _nested_modified(self, value: TypeValue) -> None:
+        self._nested_changed = True
+        self._modified()
+
+    def _nested_valid(self) -> bool:
+        nested_msg = self._nested_message
+        if nested_msg is None:
+            return True
+        return nested_msg.valid_message and (
+            not isinstance(self._expected_size, Number) or nested_msg.size == self._expected_size
+        )
 
     def set_refinement(
-        self, model_of_refinement_msg: Message, all_refinements: Sequence[Refinement]
+        self, model_of_refinement_msg: Optional[Message], all_refinements: Sequence[Refinement]
     ) -> None:
         self._refinement_message = model_of_refinement_msg
         self._all_refinements = all_refinements
 
     @property
     def size(self) -> Expr:
-        if self._value is None:
+        if not self.initialized:
             return self._expected_size if self._expected_size is not None else UNDEFINED
+        nested_msg = self._nested_message
+        if nested_msg is not None and self._nested_changed:
+            return nested_msg.size
+        if self._bits is not None:
+            return Number(len(self._bits))
+        assert self._value is not None
         return Number(len(self._value) * 8)
 
     @property
     def nested_message(self) -> Optional["MessageValue"]:
         self._raise_initialized()
+        if self._nested_message is None and self._bits is not None:
+            self.__parse_nested_message(self._bits)
         return self._nested_message
 
     @property
     def value(self) -> bytes:
         self._raise_initialized()
+        self.__update()
+        if self._value is None:
+            assert self._bits is not None
+            self._value = bytes(self._bits)
         return self._value
 
     @property
     def bitstring(self) -> Bitstring:
         self._raise_initialized()
-        return Bitstring(format(int.from_bytes(self._value, "big"), f"0{self.size}b"))
+        self.__update()
+        if self._bits is not None:
+            return self._bits
+        return Bitstring.from_bytes(self.value)
 
     @property
     def accepted_type(self) -> type:
         return bytes
 
 
-class ArrayValue(CompositeValue):
+class ArrayValue(CompositeValue):  # pylint: disable=too-many-instance-attributes
+    """Value of an array type.
+
+    Arrays of scalars whose size is a multiple of 8 bits are decoded at once into a compact array
+    of the encoded values, which is validated as a whole. The TypeValue objects of the elements
+    are only created when the value of the array is accessed.
+    """
+
+    __slots__ = (
+        "_element_type",
+        "_is_message_array",
+        "_parsed",
+        "_pool",
+        "_element",
+        "_raw",
+        "_bits",
+    )
 
     _value: List[TypeValue]
 
@@ -369,8 +533,32 @@ class ArrayValue(CompositeValue):
         self._element_type = vtype.element_type
         self._is_message_array = isinstance(self._element_type, Message)
         self._value = []
+        self._parsed = False
+        self._pool: List[MessageValue] = []
+        self._element: Optional[MessageValue] = None
+        self._raw: Optional[Sequence[int]] = None
+        self._bits: Optional[Bitstring] = None
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ArrayValue):
+            return self.value == other.value and self._type == other._type
+        return NotImplemented
+
+    def clear(self) -> None:
+        self._raw = None
+        self._bits = None
+        super().clear()
+
+    def reset(self) -> None:
+        if self._parsed:
+            self._pool.extend(v for v in reversed(self._value) if isinstance(v, MessageValue))
+        self._value = []
+        self._parsed = False
+        self._raw = None
+        self._bits = None
 
     def assign(self, value: List[TypeValue], check: bool = True) -> None:
+        # pylint: disable=protected-access
         self._check_length_of_assigned_value(value)
         for v in value:
             if self._is_message_array:
@@ -397,94 +585,334 @@ class ArrayValue(CompositeValue):
                         f"{type(self._element_type).__name__}"
                     )
 
+        for v in value:
+            v._owner = self
         self._value = value
+        self._parsed = False
+        self._raw = None
+        self._bits = None
 
     def parse(self, value: Union[Bitstring, bytes]) -> None:
+        # pylint: disable=protected-access
         self._check_length_of_assigned_value(value)
         if isinstance(value, bytes):
             value = Bitstring.from_bytes(value)
+        self._raw = None
+        self._bits = None
         if self._is_message_array:
+            self._value = []
+            self._parsed = True
+            position = 0
 
-            while len(value) != 0:
-                nested_message = TypeValue.construct(self._element_type)
-                assert isinstance(nested_message, MessageValue)
+            while position < len(value):
+                nested_message = self.__reused_message()
                 try:
-                    nested_message.parse(value)
+                    nested_message.parse(value[position:])
+                    if nested_message.size.value == 0:
+                        raise ValueError("empty message")
                 except (IndexError, ValueError, KeyError) as e:
                     raise ValueError(
                         f"cannot parse nested messages in array of type "
                         f"{self._element_type.full_name}: {e}"
                     )
                 assert nested_message.valid_message
+                nested_message._owner = self
                 self._value.append(nested_message)
-                value = value[len(nested_message.bitstring) :]
+                position += nested_message.size.value
 
         elif isinstance(self._element_type, Scalar):
-            value_str = str(value)
+            if self.__parse_scalars(value):
+                return
             type_size = self._element_type.size
             assert isinstance(type_size, Number)
             type_size_int = type_size.value
             new_value = []
 
-            while len(value_str) != 0:
+            for first in range(0, len(value), type_size_int):
                 nested_value = TypeValue.construct(self._element_type)
-                nested_value.parse(Bitstring(value_str[:type_size_int]))
+                nested_value.parse(value[first : min(first + type_size_int, len(value))])
+                nested_value._owner = self
                 new_value.append(nested_value)
-                value_str = value_str[type_size_int:]
 
             self._value = new_value
         else:
             raise NotImplementedError(f"Arrays of {self._element_type} currently not supported")
 
+    def __parse_scalars(self, value: Bitstring) -> bool:
+        assert isinstance(self._element_type, Scalar)
+        info = scalar_info(self._element_type)
+        if info.size % 8 != 0 or len(value) % info.size != 0:
+            return False
+        raw = _unpack(bytes(value), info.size // 8)
+        if raw and (info.enumeration or info.first > 0 or info.last < 2 ** info.size - 1):
+            if info.enumeration:
+                if not info.always_valid and not set(raw) <= info.names.keys():
+                    invalid = next(v for v in raw if v not in info.names)
+                    raise KeyError(f"Number {invalid} is not a valid enum value")
+            elif min(raw) < info.first or max(raw) > info.last:
+                invalid = next(v for v in raw if not info.first <= v <= info.last)
+                raise ValueError(f"value {invalid} not in type range {info.first} .. {info.last}")
+        self._value = []
+        self._raw = raw
+        self._bits = value
+        return True
+
+    def __scalar(self, raw: int) -> TypeValue:
+        # pylint: disable=protected-access
+        element = TypeValue.construct(self._element_type)
+        assert isinstance(element, ScalarValue)
+        element._parse_int(raw)
+        element._owner = self
+        return element
+
+    def clone(self) -> "TypeValue":
+        # pylint: disable=protected-access,assigning-non-slot
+        value = super().clone()
+        assert isinstance(value, ArrayValue)
+        value._value = list(self._value)
+        value._pool = []
+        return value
+
+    def __reused_message(self) -> "MessageValue":
+        # pylint: disable=protected-access
+        if self._pool:
+            message = self._pool.pop()
+            message._owner = None
+            message.reset()
+            return message
+        if self._element is None:
+            assert isinstance(self._element_type, Message)
+            self._element = _nested_schema(self._owner, self._element_type, ()).new_message()
+        return copy(self._element)
+
+    def _nested_valid(self) -> bool:
+        if not self._is_message_array or not self.initialized:
+            return True
+        return all(
+            element.valid_message for element in self._value if isinstance(element, MessageValue)
+        ) and (not isinstance(self._expected_size, Number) or self.size == self._expected_size)
+
     @property
     def size(self) -> Expr:
+        if self._bits is not None:
+            return Number(len(self._bits))
         if not self._value:
             return self._expected_size if self._expected_size is not None else UNDEFINED
-        return Number(len(self.bitstring))
+        size = 0
+        for element in self._value:
+            element_size = element.size
+            assert isinstance(element_size, Number)
+            size += element_size.value
+        return Number(size)
 
     @property
     def value(self) -> Sequence[TypeValue]:
         self._raise_initialized()
+        if self._raw is not None:
+            self._value = [self.__scalar(v) for v in self._raw]
+            self._raw = None
+            self._bits = None
         return self._value
 
+    @property
+    def raw(self) -> Sequence[int]:
+        """Return the encoded values of the elements of an array of scalars."""
+        self._raise_initialized()
+        if self._raw is not None:
+            return self._raw
+        if self._is_message_array:
+            raise ValueError("array of messages has no raw values")
+        return [int(element.bitstring) for element in self._value]
+
     @property
     def bitstring(self) -> Bitstring:
         self._raise_initialized()
-        bits = [element.bitstring for element in self._value]
-        return Bitstring.join(bits)
+        if self._bits is not None:
+            return self._bits
+        writer = BitWriter()
+        for element in self._value:
+            writer.write(element.bitstring)
+        return writer.bitstring
 
     @property
     def accepted_type(self) -> type:
         return list
 
 
-class MessageValue(TypeValue):
+class MessageSchema:
+    """Compiled representation of a message type, which is shared by all messages of the type."""
+
+    __slots__ = (
+        "message",
+        "refinements",
+        "plan",
+        "refinement_index",
+        "prototype",
+        "nested",
+        "__weakref__",
+    )
+
+    def __init__(self, message: Message, refinements: Sequence[Refinement]) -> None:
+        self.message = message
+        self.refinements = tuple(refinements)
+        self.plan = parse_plan(message)
+        self.refinement_index = self.plan.refinement_index(self.refinements)
+        self.nested: Dict[Tuple[int, Tuple[int, ...]], MessageSchema] = {}
+        self.prototype = MessageValue._create_prototype(self)
+
+    def __repr__(self) -> str:
+        return f"MessageSchema({self.message.identifier})"
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__[:-1])
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__slots__[:-1], state):
+            setattr(self, name, value)
+        with _SCHEMA_LOCK:
+            _SCHEMAS.setdefault(_schema_key(self.message, self.refinements), self)
+
+    def nested_schema(self, message: Message, refinements: Sequence[Refinement]) -> "MessageSchema":
+        """Return the schema of a message contained in messages of this schema."""
+        key = _schema_key(message, refinements)
+        schema = self.nested.get(key)
+        if schema is None:
+            schema = message_schema(message, refinements)
+            self.nested[key] = schema
+        return schema
+
+    def new_message(self) -> "MessageValue":
+        """Return a new message in its initial state."""
+        return copy(self.prototype)
+
+
+class MessageValue(TypeValue):  # pylint: disable=too-many-instance-attributes
+    """Value and parsing state of a message.
+
+    All data which depends only on the type of the message is kept in a shared schema.
+    """
+
+    # pylint: disable=too-many-public-methods
+
+    __slots__ = (
+        "_schema",
+        "_plan",
+        "_fields",
+        "__env",
+        "__state",
+        "__state_complete",
+        "_last_field",
+        "__version",
+        "__serialized",
+        "__size",
+    )
 
     _type: Message
 
     def __init__(self, model: Message, refinements: Sequence[Refinement] = None) -> None:
+        """Create a message in its initial state, which is cloned from the prototype of its schema.
+
+        The model, the parse plan and the refinements are shared by all messages of the same type.
+        """
+        # pylint: disable=protected-access
         super().__init__(model)
-        self._refinements = refinements or []
+        prototype = message_schema(model, refinements).prototype
+        self._schema: MessageSchema = prototype._schema
+        self._plan: ParsePlan = prototype._plan
         self._fields: Dict[str, MessageValue.Field] = {
-            f.name: self.Field(TypeValue.construct(self._type.types[f])) for f in self._type.fields
+            n: f.clone() for n, f in prototype._fields.items()
         }
-        self.__type_literals: Mapping[Name, Expr] = {}
-        self._last_field: str = self._next_field(INITIAL.name)
-        for t in [
-            f.typeval.literals for f in self._fields.values() if isinstance(f.typeval, EnumValue)
-        ]:
-            self.__type_literals = {**self.__type_literals, **t}
-        initial = self.Field(OpaqueValue(Opaque()))
-        initial.first = Number(0)
+        self.__env: Dict[str, int] = dict(prototype.__env)
+        self.__state: List[Tuple[str, bool]] = list(prototype.__state)
+        self.__state_complete: bool = prototype.__state_complete
+        self._last_field: str = prototype._last_field
+        self.__version = 0
+        self.__serialized: Optional[Tuple[int, Bitstring, bytes]] = None
+        self.__size: Optional[Tuple[int, Number]] = None
+        for f in self._plan.composite_fields:
+            self._fields[f].typeval._owner = self
+
+    @classmethod
+    def _create_prototype(cls, schema: MessageSchema) -> "MessageValue":
+        # pylint: disable=protected-access
+        message = object.__new__(cls)
+        TypeValue.__init__(message, schema.message)
+        message._schema = schema
+        message._plan = schema.plan
+        message._fields = {
+            f.name: cls.Field(TypeValue.construct(message._type.types[f]))
+            for f in message._type.fields
+        }
+        message.__env = {}
+        message.__state = []
+        message.__state_complete = False
+        message.__version = 0
+        message.__serialized = None
+        message.__size = None
+        message._last_field = message._next_field(_INITIAL)
+        for f in message._plan.composite_fields:
+            message._fields[f].typeval._owner = message
+        initial = cls.Field(OpaqueValue(Opaque()))
+        initial.position = 0
         initial.typeval.assign(bytes())
-        self._fields[INITIAL.name] = initial
-        self._preset_fields(INITIAL.name)
+        message._fields[_INITIAL] = initial
+        message.__changed(_INITIAL)
+        message._preset_fields(_INITIAL)
+        message.__field_state()
+        return message
 
     def __copy__(self) -> "MessageValue":
-        return MessageValue(self._type, self._refinements)
+        """Return a new message of the same type in its initial state."""
+        return self.__class__(self._type, self._schema.refinements)
+
+    @property
+    def schema(self) -> MessageSchema:
+        return self._schema
+
+    @property
+    def _refinements(self) -> Sequence[Refinement]:
+        return self._schema.refinements
+
+    def reset(self) -> None:
+        """Reset the message to its initial state.
+
+        A message can be reused for parsing any number of messages by resetting it before each
+        parse. The objects of all fields are kept and cleared in place. Nested messages of
+        refined opaque fields and arrays created by parsing are reused for subsequently parsed
+        values. All values obtained from the message before the reset, in particular nested
+        messages, must not be used afterwards.
+        """
+        # pylint: disable=protected-access
+        prototype = self._schema.prototype
+        for name, field in self._fields.items():
+            if name == _INITIAL:
+                continue
+            initial = prototype._fields[name]
+            field.first = initial.first
+            field.pending = None
+            field.typeval.reset()
+            if isinstance(field.typeval, CompositeValue):
+                assert isinstance(initial.typeval, CompositeValue)
+                field.typeval.set_expected_size(initial.typeval.expected_size)
+        self.__env.clear()
+        self.__env.update(prototype.__env)
+        self.__state[:] = prototype.__state
+        self.__state_complete = prototype.__state_complete
+        self._last_field = prototype._last_field
+        self.__version += 1
+        self.__serialized = None
+        self.__size = None
+        self._modified()
 
     def __repr__(self) -> str:
-        return generic_repr(self.__class__.__name__, self.__dict__)
+        return generic_repr(
+            self.__class__.__name__,
+            {
+                k: v
+                for k, v in self._attributes().items()
+                if k not in ["_schema", "_MessageValue__serialized", "_MessageValue__size",]
+            },
+        )
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, self.__class__):
@@ -494,65 +922,85 @@ class MessageValue(TypeValue):
     def equal_type(self, other: Type) -> bool:
         return self.identifier == other.identifier
 
-    def _valid_refinement_condition(self, refinement: Refinement) -> bool:
-        return self.__simplified(refinement.condition) == TRUE
-
     def _next_field(self, fld: str) -> str:
-        if fld == FINAL.name:
+        if fld == _FINAL:
             return ""
-        if fld == INITIAL.name:
-            links = self._type.outgoing(INITIAL)
+        if fld == _INITIAL:
+            links = self._plan.initial.links
             if not links:
-                return FINAL.name
-            return links[0].target.name
+                return _FINAL
+            return links[0].target
 
-        for l in self._type.outgoing(Field(fld)):
-            if self.__simplified(l.condition) == TRUE:
-                return l.target.name
+        env = self.__env
+        for l in self._plan.steps[fld].links:
+            if l.condition(env) is True:
+                return l.target
         return ""
 
     def _prev_field(self, fld: str) -> str:
-        if fld == INITIAL.name:
+        if fld == _INITIAL:
             return ""
-        for l in self._type.incoming(Field(fld)):
-            if self.__simplified(l.condition) == TRUE:
-                return l.source.name
+        env = self.__env
+        for l in self._plan.steps[fld].incoming:
+            if l.condition(env) is True:
+                return l.source
         return ""
 
     def _get_length_unchecked(self, fld: str) -> Expr:
-        for l in self._type.incoming(Field(fld)):
-            if self.__simplified(l.condition) == TRUE and l.length != UNDEFINED:
-                return self.__simplified(l.length)
-
-        typeval = self._fields[fld].typeval
-        if isinstance(typeval, ScalarValue):
-            return typeval.size
+        length = self.__length(fld)
+        if length is not None:
+            return Number(length)
+        env = self.__env
+        for l in self._plan.steps[fld].incoming:
+            if l.condition(env) is True and l.length_evaluator is not None:
+                return l.link.length
         return UNDEFINED
 
     def _has_length(self, fld: str) -> bool:
-        return isinstance(self._get_length_unchecked(fld), Number)
+        return self.__length(fld) is not None
 
     def _get_length(self, fld: str) -> Number:
-        length = self._get_length_unchecked(fld)
-        assert isinstance(length, Number)
-        return length
+        length = self.__length(fld)
+        assert length is not None
+        return Number(length)
+
+    def __length(self, fld: str) -> Optional[int]:
+        env = self.__env
+        for l in self._plan.steps[fld].incoming:
+            if l.condition(env) is True and l.length_evaluator is not None:
+                return l.length_evaluator(env)
+        return self._plan.steps[fld].size
 
     def _get_first_unchecked(self, fld: str) -> Expr:
-        for l in self._type.incoming(Field(fld)):
-            if self.__simplified(l.condition) == TRUE and l.first != UNDEFINED:
-                return self.__simplified(l.first)
-        prv = self._prev_field(fld)
-        if prv:
-            return self.__simplified(Add(self._fields[prv].first, self._fields[prv].typeval.size))
+        first = self.__first(fld)
+        if first is not None:
+            return Number(first)
+        env = self.__env
+        for l in self._plan.steps[fld].incoming:
+            if l.condition(env) is True and l.first_evaluator is not None:
+                return l.link.first
         return UNDEFINED
 
     def _has_first(self, fld: str) -> bool:
-        return isinstance(self._get_first_unchecked(fld), Number)
+        return self.__first(fld) is not None
 
     def _get_first(self, fld: str) -> Number:
-        first = self._get_first_unchecked(fld)
-        assert isinstance(first, Number)
-        return first
+        first = self.__first(fld)
+        assert first is not None
+        return Number(first)
+
+    def __first(self, fld: str) -> Optional[int]:
+        env = self.__env
+        for l in self._plan.steps[fld].incoming:
+            if l.condition(env) is True and l.first_evaluator is not None:
+                return l.first_evaluator(env)
+        prv = self._prev_field(fld)
+        if prv:
+            field = self._fields[prv]
+            length = field.length
+            if field.position is not None and length is not None:
+                return field.position + length
+        return None
 
     @property
     def accepted_type(self) -> type:
@@ -560,159 +1008,317 @@ class MessageValue(TypeValue):
 
     @property
     def size(self) -> Number:
-        return Number(len(self.bitstring))
+        """Return the size of the serialized message without serializing it."""
+        if self.__size is None or self.__size[0] != self.__version:
+            self.__size = (self.__version, self.__compute_size())
+        return self.__size[1]
+
+    def __compute_size(self) -> Number:
+        size = 0
+        field = self._next_field(_INITIAL)
+        while field and field != _FINAL:
+            field_val = self._fields[field]
+            length = field_val.length
+            if (
+                not field_val.set
+                or field_val.position is None
+                or length is None
+                or not field_val.position <= size
+            ):
+                break
+            size = field_val.position + length
+            field = self._next_field(field)
+        return Number(size)
 
     def assign(self, value: bytes, check: bool = True) -> None:
         raise NotImplementedError
 
-    def parse(self, value: Union[Bitstring, bytes]) -> None:
+    def parse(
+        self, value: Union[Bitstring, bytes], lazy: bool = False, fields: Sequence[str] = None
+    ) -> None:
+        """Parse the message.
+
+        In lazy mode, only the values of fields referenced by conditions, first or length
+        expressions of the message or its refinements are decoded. The values of all other fields
+        are decoded on first access by get().
+
+        If fields are given, only these fields and the fields they depend on are decoded. Parsing
+        stops after the last of the given fields, all subsequent fields stay unset.
+        """
         if isinstance(value, bytes):
             value = Bitstring.from_bytes(value)
-        current_field_name = self._next_field(INITIAL.name)
-        last_field_first_in_bitstr = current_field_first_in_bitstr = 0
-        current_field_length = 0
+        parser = self.parser(lazy, fields)
+        try:
+            field_name, first, length = next(parser)
+            while True:
+                if length is None:
+                    field_bits = value[first:]
+                else:
+                    try:
+                        field_bits = value[first : first + length]
+                    except IndexError:
+                        raise IndexError(
+                            f"Bitstring representing the message is too short - "
+                            f"stopped while parsing field: {field_name}"
+                        )
+                field_name, first, length = parser.send(field_bits)
+        except StopIteration:
+            pass
+
+    def parser(
+        self, lazy: bool = False, fields: Sequence[str] = None
+    ) -> Generator[Tuple[str, int, Optional[int]], Bitstring, None]:
+        """Return a generator which parses the message field by field.
+
+        The generator yields the name, the first bit and the length of the next field along the
+        path of the message and expects to be sent the bits of this field. The length is None if
+        the field extends to the end of the message data. The generator stops when the end of the
+        message is reached. The arguments have the same meaning as for parse().
+        """
+        referenced = self.__referenced_fields([_FINAL]) if lazy else None
+        last = None
+        if fields is not None:
+            for f in fields:
+                if f not in self._plan.steps or f == _INITIAL:
+                    raise KeyError(f"unknown field {f}")
+            referenced = {*fields, *self.__referenced_fields(fields)}
+            last = max(self._plan.index[f] for f in fields)
+        link = self._plan.initial.successor
+        position = 0
+
+        while link is not None and link.target != _FINAL:
+            field_name = link.target
+            field = self._fields[field_name]
+            first = self.__link_first(link, position)
+            assert first is not None
+            length = self.__link_length(link)
+            assert length is not None or isinstance(field.typeval, OpaqueValue)
+            field_bits = yield field_name, first, length
+            field.position = first
+            if referenced is not None and field_name not in referenced:
+                self.__defer(field_name, field, field_bits, length)
+            else:
+                self.__assign(field_name, field, field_bits, length)
+            link = self.__next_link(self._plan.steps[field_name], field_bits)
+            position = first + len(field_bits)
+            if last is not None and self._plan.index[field_name] >= last:
+                break
 
-        def get_current_pos_in_bitstr(field_name: str) -> int:
-            # if the previous node is a virtual node i.e. has the same first as the current node
-            # set the current pos in bitstring back to the first position of its predecessor
-            this_first = self._fields[field_name].first
-            prev_first = self._fields[self._prev_field(field_name)].first
+    def validate(self, value: Union[Bitstring, bytes]) -> Tuple[bool, Optional[str], int]:
+        """Check if value represents a valid message without changing the message.
 
-            if not isinstance(prev_first, Number) or not isinstance(this_first, Number):
-                return current_field_first_in_bitstr
+        Return whether the message is valid, the first invalid field and the bit position of this
+        field. If the message is valid, the number of bits used by the message is returned as
+        position.
+        """
+        if isinstance(value, bytes):
+            value = Bitstring.from_bytes(value)
+        return self._plan.validate(value, self._refinements)
+
+    def __link_first(self, link: PlanLink, default: int) -> Optional[int]:
+        if link.first is not None:
+            return link.first
+        if link.first_evaluator is None:
+            return default
+        return link.first_evaluator(self.__env)
+
+    def __link_length(self, link: PlanLink) -> Optional[int]:
+        if link.length is not None:
+            return link.length
+        if link.length_evaluator is None:
+            return None
+        return link.length_evaluator(self.__env)
+
+    def __next_link(
+        self, step: PlanStep, value: Union[bytes, int, str, Sequence[TypeValue], Bitstring]
+    ) -> Optional[PlanLink]:
+        if step.successor is not None:
+            return step.successor
+        if step.dispatch is not None:
+            link = step.dispatch.get(self._fields[step.name].typeval.value)
+            if link is not None:
+                return link
+        env = self.__env
+        conditions = [l.condition(env) for l in step.links]
+        for link, condition in zip(step.links, conditions):
+            if condition is True:
+                return link
+        if all(c is False for c in conditions):
+            self.__raise_unmet_conditions(step.name, value)
+        return None
 
-            return (
-                last_field_first_in_bitstr
-                if prev_first.value == this_first.value
-                else current_field_first_in_bitstr
-            )
+    def set(
+        self, field_name: str, value: Union[bytes, int, str, Sequence[TypeValue], Bitstring]
+    ) -> None:
+        if field_name not in self.accessible_fields:
+            raise KeyError(f"cannot access field {field_name}")
 
-        def set_field_without_length(field_name: str, field: MessageValue.Field) -> Tuple[int, int]:
-            last_pos_in_bitstr = current_pos_in_bitstring = get_current_pos_in_bitstr(field_name)
-            assert isinstance(field.typeval, OpaqueValue)
-            field.first = self._get_first(field_name)
-            self.set(field_name, value[current_pos_in_bitstring:])
-            return last_pos_in_bitstr, current_pos_in_bitstring
-
-        def set_field_with_length(field_name: str, field_length: int) -> Tuple[int, int]:
-            assert isinstance(value, Bitstring)
-            last_pos_in_bitstr = current_pos_in_bitstring = get_current_pos_in_bitstr(field_name)
-            if field_length < 8 or field_length % 8 == 0:
-                self.set(
-                    field_name,
-                    value[current_pos_in_bitstring : current_pos_in_bitstring + field_length],
-                )
-                current_pos_in_bitstring += field_length
-            else:
-                bytes_used_for_field = field_length // 8 + 1
-                first_pos = current_pos_in_bitstring
-                field_bits = Bitstring()
-
-                for _ in range(bytes_used_for_field - 1):
-                    field_bits += value[current_pos_in_bitstring : current_pos_in_bitstring + 8]
-                    current_pos_in_bitstring += 8
-
-                k = field_length // bytes_used_for_field + 1
-                field_bits += value[current_pos_in_bitstring + 8 - k : first_pos + field_length]
-                current_pos_in_bitstring = first_pos + field_length
-                self.set(field_name, field_bits)
-            return last_pos_in_bitstr, current_pos_in_bitstring
-
-        while current_field_name != FINAL.name:
-            current_field = self._fields[current_field_name]
-            if isinstance(current_field.typeval, OpaqueValue) and not self._has_length(
-                current_field_name
-            ):
-                (
-                    last_field_first_in_bitstr,
-                    current_field_first_in_bitstr,
-                ) = set_field_without_length(current_field_name, current_field)
+        field = self._fields[field_name]
+        field.position = self.__first(field_name)
+        assert field.position is not None
+        self.__assign(field_name, field, value, self.__length(field_name))
 
-            else:
-                assert self._has_length(current_field_name)
-                current_field_length = self._get_length(current_field_name).value
-                try:
-                    (
-                        last_field_first_in_bitstr,
-                        current_field_first_in_bitstr,
-                    ) = set_field_with_length(current_field_name, current_field_length)
-                except IndexError:
-                    raise IndexError(
-                        f"Bitstring representing the message is too short - "
-                        f"stopped while parsing field: {current_field_name}"
-                    )
-            current_field_name = self._next_field(current_field_name)
+        env = self.__env
+        if all(o.condition(env) is False for o in self._plan.steps[field_name].links):
+            self.__raise_unmet_conditions(field_name, value)
 
-    def set(
-        self, field_name: str, value: Union[bytes, int, str, Sequence[TypeValue], Bitstring]
+        self._preset_fields(field_name)
+
+    def set_fields(
+        self, values: Mapping[str, Union[bytes, int, str, Sequence[TypeValue], Bitstring]]
     ) -> None:
-        def set_refinement(fld: MessageValue.Field, fld_name: str) -> None:
-            if isinstance(fld.typeval, OpaqueValue):
-                for ref in self._refinements:
-                    if (
-                        ref.pdu.name == self.name
-                        and ref.field.name == fld_name
-                        and self._valid_refinement_condition(ref)
-                    ):
-                        fld.typeval.set_refinement(ref.sdu, self._refinements)
-
-        if field_name in self.accessible_fields:
+        """Set multiple fields at once.
+
+        The fields are set in topological order along the path of the message. The outgoing
+        conditions of each field are evaluated once to determine the next field of the path.
+        Fields which cannot be reached this way, e.g. because a preceding field is not set, are
+        set individually by set().
+        """
+        for field_name in values:
+            if field_name not in self._plan.steps or field_name == _INITIAL:
+                raise KeyError(f"cannot access field {field_name}")
+        remaining = {f.name: values[f.name] for f in self._type.fields if f.name in values}
+
+        link = self._plan.initial.successor
+        position = 0
+        last_field = _INITIAL
+
+        while remaining and link is not None and link.target != _FINAL:
+            field_name = link.target
             field = self._fields[field_name]
-            field.first = self._get_first(field_name)
-            if isinstance(field.typeval, CompositeValue) and self._has_length(field_name):
-                field.typeval.set_expected_size(self._get_length(field_name))
-            set_refinement(field, field_name)
-            try:
-                if isinstance(value, Bitstring):
-                    field.typeval.parse(value)
-                elif isinstance(value, field.typeval.accepted_type):
-                    field.typeval.assign(value)
-                else:
-                    raise TypeError(
-                        f"cannot assign different types: {field.typeval.accepted_type.__name__}"
-                        f" != {type(value).__name__}"
+            step = self._plan.steps[field_name]
+            if field_name in remaining:
+                first = self.__link_first(link, position)
+                length = self.__link_length(link)
+                if first is None or (
+                    length is None
+                    and not (
+                        isinstance(step.type, Opaque) and self._is_valid_opaque_field(field_name)
                     )
-            except (ValueError, KeyError, TypeError) as e:
-                raise ValueError(f"Error while setting value for field {field_name}: {e}")
-        else:
-            raise KeyError(f"cannot access field {field_name}")
-
-        if all(
-            [
-                self.__simplified(o.condition) == FALSE
-                for o in self._type.outgoing(Field(field_name))
-            ]
-        ):
-            self._fields[field_name].typeval.clear()
-            if isinstance(value, bytes):
-                value_repr = "x" + value.hex()
+                ):
+                    break
+                value = remaining.pop(field_name)
+                field.position = first
+                self.__assign(field_name, field, value, length)
+            elif field.set and field.position is not None:
+                first = self.__link_first(link, position)
+                length = self.__link_length(link)
+                if first != field.position or length not in (None, field.length):
+                    # the field is moved or cleared by _preset_fields
+                    break
+                field.decode()
+                value = field.typeval.value
             else:
-                value_repr = str(value)
+                break
+            size = field.length
+            assert size is not None
+            link = self.__next_link(step, value)
+            position = first + size
+            last_field = field_name
+
+        self._preset_fields(last_field)
+
+        for field_name, value in remaining.items():
+            self.set(field_name, value)
+
+    def __assign(
+        self,
+        field_name: str,
+        field: "MessageValue.Field",
+        value: Union[bytes, int, str, Sequence[TypeValue], Bitstring],
+        length: Optional[int],
+    ) -> None:
+        self.__prepare(field_name, field, length)
+        field.pending = None
+        try:
+            if isinstance(value, Bitstring):
+                field.typeval.parse(value)
+            elif isinstance(value, field.typeval.accepted_type):
+                field.typeval.assign(value)
+            else:
+                raise TypeError(
+                    f"cannot assign different types: {field.typeval.accepted_type.__name__}"
+                    f" != {type(value).__name__}"
+                )
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Error while setting value for field {field_name}: {e}")
+        finally:
+            self.__changed(field_name)
 
-            raise ValueError(
-                f"none of the field conditions "
-                f"{[str(o.condition) for o in self._type.outgoing(Field(field_name))]}"
-                f" for field {field_name} have been met by the assigned value: {value_repr}"
+    def __defer(
+        self, field_name: str, field: "MessageValue.Field", value: Bitstring, length: Optional[int]
+    ) -> None:
+        if not self._plan.valid_value(
+            self._plan.steps[field_name], value, self.__env, self._refinements
+        ):
+            self.__assign(field_name, field, value, length)
+            return
+        self.__prepare(field_name, field, length)
+        field.typeval.clear()
+        field.pending = value
+        self.__changed(field_name)
+
+    def __prepare(
+        self, field_name: str, field: "MessageValue.Field", length: Optional[int]
+    ) -> None:
+        if isinstance(field.typeval, CompositeValue) and length is not None:
+            field.typeval.set_expected_size(Number(length))
+        if isinstance(field.typeval, OpaqueValue):
+            field.typeval.set_refinement(
+                self._schema.refinement_index.refined_message(field_name, self.__env),
+                self._refinements,
             )
 
-        self._preset_fields(field_name)
+    def __referenced_fields(self, fields: Sequence[str]) -> Set[str]:
+        """Return all fields whose values are needed to locate and refine the given fields."""
+        last = max(self._plan.index[f] for f in fields)
+        refinements = self._schema.refinement_index.refinements
+        return self._plan.dependencies(fields) | {
+            name
+            for field, entries in refinements.items()
+            if self._plan.index[field] <= last
+            for condition, _ in entries
+            for name in condition.names
+        }
+
+    def __raise_unmet_conditions(
+        self, field_name: str, value: Union[bytes, int, str, Sequence[TypeValue], Bitstring]
+    ) -> NoReturn:
+        self._fields[field_name].typeval.clear()
+        self.__changed(field_name)
+        if isinstance(value, bytes):
+            value_repr = "x" + value.hex()
+        else:
+            value_repr = str(value)
+
+        raise ValueError(
+            f"none of the field conditions "
+            f"{[str(o.condition) for o in self._type.outgoing(Field(field_name))]}"
+            f" for field {field_name} have been met by the assigned value: {value_repr}"
+        )
 
     def _preset_fields(self, fld: str) -> None:
         nxt = self._next_field(fld)
-        while nxt and nxt != FINAL.name:
+        while nxt and nxt != _FINAL:
             field = self._fields[nxt]
-            if not self._has_first(nxt) or not self._has_length(nxt):
+            first = self.__first(nxt)
+            length = self.__length(nxt)
+            if first is None or length is None:
                 break
 
-            field.first = self._get_first(nxt)
+            field.position = first
             if isinstance(field.typeval, OpaqueValue):
-                field.typeval.set_expected_size(self._get_length(nxt))
+                field.typeval.set_expected_size(Number(length))
 
             if field.set and isinstance(field.typeval, OpaqueValue):
                 field.first = UNDEFINED
+                field.pending = None
                 field.typeval.clear()
+                self.__changed(nxt)
                 break
 
+            self.__changed(nxt)
+
             self._last_field = nxt
             nxt = self._next_field(nxt)
 
@@ -720,26 +1326,19 @@ class MessageValue(TypeValue):
         if field_name not in self.valid_fields:
             raise ValueError(f"field {field_name} not valid")
         field = self._fields[field_name]
+        if field.pending is not None:
+            try:
+                field.decode()
+            except (ValueError, KeyError) as e:
+                self.__changed(field_name)
+                raise ValueError(f"Error while setting value for field {field_name}: {e}")
         if isinstance(field.typeval, OpaqueValue) and field.typeval.nested_message is not None:
             return field.typeval.nested_message
         return self._fields[field_name].typeval.value
 
     @property
     def bitstring(self) -> Bitstring:
-        bits = ""
-        field = self._next_field(INITIAL.name)
-        while field and field != FINAL.name:
-            field_val = self._fields[field]
-            if (
-                not field_val.set
-                or not isinstance(field_val.first, Number)
-                or not field_val.first.value <= len(bits)
-            ):
-                break
-            bits = bits[: field_val.first.value] + str(self._fields[field].typeval.bitstring)
-            field = self._next_field(field)
-
-        return Bitstring(bits)
+        return self.__serialize()[1]
 
     @property
     def value(self) -> Any:
@@ -747,13 +1346,43 @@ class MessageValue(TypeValue):
 
     @property
     def bytestring(self) -> bytes:
-        bits = str(self.bitstring)
+        return self.__serialize()[2]
+
+    def __serialize(self) -> Tuple[int, Bitstring, bytes]:
+        """Return the serialized message, serializing it only if it has been changed."""
+        version = self.__version
+        if self.__serialized is not None and self.__serialized[0] == version:
+            return self.__serialized
+        writer = BitWriter()
+        field = self._next_field(_INITIAL)
+        while field and field != _FINAL:
+            field_val = self._fields[field]
+            if (
+                not field_val.set
+                or field_val.position is None
+                or not field_val.position <= len(writer)
+            ):
+                break
+            writer.truncate(field_val.position)
+            writer.write(
+                field_val.pending if field_val.pending is not None else field_val.typeval.bitstring
+            )
+            field = self._next_field(field)
+        bits = writer.bitstring
         if len(bits) < 8:
-            bits = bits.ljust(8, "0")
-
-        return b"".join(
-            [int(bits[i : i + 8], 2).to_bytes(1, "big") for i in range(0, len(bits), 8)]
+            data = bytes(bits + Bitstring.from_int(0, 8 - len(bits)))
+        else:
+            data = bytes(bits)
+        self.__serialized = (version, bits, data)
+        return self.__serialized
+
+    def _nested_modified(self, value: TypeValue) -> None:
+        """Update the field containing a nested value which has been changed in place."""
+        field_name = next(
+            f for f in self._plan.composite_fields if self._fields[f].typeval is value
         )
+        self.__changed(field_name)
+        self._preset_fields(field_name)
 
     @property
     def fields(self) -> List[str]:
@@ -761,31 +1390,15 @@ class MessageValue(TypeValue):
 
     @property
     def accessible_fields(self) -> List[str]:
-        nxt = self._next_field(INITIAL.name)
-        fields: List[str] = []
-        while nxt and nxt != FINAL.name:
-
-            if (
-                self.__simplified(self._type.field_condition(Field(nxt))) != TRUE
-                or not self._has_first(nxt)
-                or (
-                    not self._has_length(nxt)
-                    if not isinstance(self._fields[nxt].typeval, OpaqueValue)
-                    else not self._is_valid_opaque_field(nxt)
-                )
-            ):
-                break
-
-            fields.append(nxt)
-            nxt = self._next_field(nxt)
-        return fields
+        return [f for f, _ in self.__field_state()]
 
     def _is_valid_opaque_field(self, field: str) -> bool:
         if self._get_length_unchecked(field) == UNDEFINED:
             return False
 
-        for edge in self._type.incoming(Field(field)):
-            if self.__simplified(edge.condition) == TRUE:
+        env = self.__env
+        for edge in self._plan.steps[field].incoming:
+            if edge.condition(env) is True:
                 valid_edge = edge
                 break
         else:
@@ -794,79 +1407,248 @@ class MessageValue(TypeValue):
         return all(
             [
                 (v.name in self._fields and self._fields[v.name].set) or v.name == "Message"
-                for v in valid_edge.length.variables()
+                for v in valid_edge.link.length.variables()
             ]
         )
 
     @property
     def valid_fields(self) -> List[str]:
-        return [
-            f
-            for f in self.accessible_fields
-            if (
-                self._fields[f].set
-                and self.__simplified(self._type.field_condition(Field(f))) == TRUE
-                and any(
-                    [self.__simplified(i.condition) == TRUE for i in self._type.incoming(Field(f))]
-                )
-                and any(
-                    [self.__simplified(o.condition) == TRUE for o in self._type.outgoing(Field(f))]
-                )
-            )
-        ]
+        return [f for f, valid in self.__field_state() if valid]
 
     @property
     def required_fields(self) -> List[str]:
-        accessible = self.accessible_fields
-        valid = self.valid_fields
-        return [f for f in accessible if f not in valid]
+        return [f for f, valid in self.__field_state() if not valid]
+
+    @property
+    def version(self) -> int:
+        """Return a number which is increased on every change of the message."""
+        return self.__version
 
     @property
     def valid_message(self) -> bool:
-        return bool(self.valid_fields) and self._next_field(self.valid_fields[-1]) == FINAL.name
-
-    def __simplified(self, expr: Expr) -> Expr:
-        field_values: Mapping[Name, Expr] = {
-            **{
-                Variable(k): v.typeval.expr
-                for k, v in self._fields.items()
-                if isinstance(v.typeval, ScalarValue) and v.set
-            },
-            **{Length(k): v.typeval.size for k, v in self._fields.items() if v.set},
-            **{First(k): v.first for k, v in self._fields.items() if v.set},
-            **{Last(k): v.last for k, v in self._fields.items() if v.set},
-        }
+        return bool(self.valid_fields) and self._next_field(self.valid_fields[-1]) == _FINAL
 
-        mapping = {**field_values, **self.__type_literals}
+    def __field_state(self) -> List[Tuple[str, bool]]:
+        """Return the accessible fields and their validity, extending the cached prefix."""
+        if self.__state_complete:
+            return self.__state
+        env = self.__env
+        nxt = self._next_field(self.__state[-1][0] if self.__state else _INITIAL)
+        while nxt and nxt != _FINAL:
+            step = self._plan.steps[nxt]
 
-        return expr.substituted(mapping=mapping).substituted(mapping=mapping).simplified()
+            if (
+                step.condition(env) is not True
+                or not self._has_first(nxt)
+                or (
+                    not self._has_length(nxt)
+                    if not isinstance(step.type, Opaque)
+                    else not self._is_valid_opaque_field(nxt)
+                )
+            ):
+                break
+
+            field = self._fields[nxt]
+            valid = (
+                field.set
+                and (
+                    field.pending is not None
+                    or not isinstance(field.typeval, CompositeValue)
+                    or field.typeval._nested_valid()  # pylint: disable=protected-access
+                )
+                and any(i.condition(env) is True for i in step.incoming)
+                and any(o.condition(env) is True for o in step.links)
+            )
+            self.__state.append((nxt, valid))
+            nxt = self._next_field(nxt)
+        self.__state_complete = True
+        return self.__state
+
+    def __changed(self, field_name: str) -> None:
+        """Update the environment and invalidate the state of all fields depending on a field.
+
+        The accessibility and validity of a field only depend on the field itself and its
+        predecessors. The cached state of all fields preceding the changed field stays valid.
+        """
+        field = self._fields[field_name]
+        env = self.__env
+        for key in [
+            field_name,
+            f"{field_name}'First",
+            f"{field_name}'Length",
+            f"{field_name}'Last",
+        ]:
+            env.pop(key, None)
+        typeval = field.typeval
+        first = field.position
+        length = field.length
+        if (
+            (field.pending is not None or typeval.initialized)
+            and first is not None
+            and length is not None
+        ):
+            # values of lazily parsed fields are not referenced by any expression
+            if field.pending is None and isinstance(typeval, IntegerValue):
+                env[field_name] = typeval.value
+            elif field.pending is None and isinstance(typeval, EnumValue):
+                if typeval.value in self._plan.literals:
+                    env[field_name] = self._plan.literals[typeval.value]
+            env[f"{field_name}'First"] = first
+            env[f"{field_name}'Length"] = length
+            env[f"{field_name}'Last"] = first + length - 1
+
+        index = self._plan.index[field_name]
+        while self.__state and self._plan.index[self.__state[-1][0]] >= index:
+            self.__state.pop()
+        self.__state_complete = False
+        self.__version += 1
+        self._modified()
 
     class Field:
+        """Value and location of a message field.
+
+        The first bit of the field is stored as integer as soon as it is known. Until then, the
+        symbolic expression of the first bit is kept.
+        """
+
+        __slots__ = ("typeval", "pending", "position", "__first")
+
         def __init__(self, t: TypeValue):
             self.typeval = t
-            self.first: Expr = UNDEFINED
+            self.pending: Optional[Bitstring] = None
+            self.position: Optional[int] = None
+            self.__first: Expr = UNDEFINED
 
         def __eq__(self, other: object) -> bool:
             if isinstance(other, MessageValue.Field):
-                return (
-                    self.first == other.first
-                    and self.last == other.last
-                    and self.typeval == other.typeval
-                )
+                if self.first != other.first or self.last != other.last:
+                    return False
+                if self.pending is None and other.pending is None:
+                    return self.typeval == other.typeval
+                return self.__bits() == other.__bits()  # pylint: disable=protected-access
             return NotImplemented
 
         def __repr__(self) -> str:
-            return generic_repr(self.__class__.__name__, self.__dict__)
+            return generic_repr(
+                self.__class__.__name__,
+                {"typeval": self.typeval, "first": self.first, "pending": self.pending},
+            )
+
+        def clone(self) -> "MessageValue.Field":
+            # pylint: disable=protected-access
+            field = MessageValue.Field(self.typeval.clone())
+            field.pending = self.pending
+            field.position = self.position
+            field.__first = self.__first
+            return field
+
+        def __bits(self) -> Optional[Bitstring]:
+            if self.pending is not None:
+                return self.pending
+            return self.typeval.bitstring if self.typeval.initialized else None
+
+        def decode(self) -> None:
+            """Decode the value of a lazily parsed field."""
+            if self.pending is not None:
+                value = self.pending
+                self.pending = None
+                self.typeval.parse(value)
+
+        @property
+        def first(self) -> Expr:
+            return Number(self.position) if self.position is not None else self.__first
+
+        @first.setter
+        def first(self, first: Expr) -> None:
+            if isinstance(first, Number):
+                self.position = first.value
+                self.__first = UNDEFINED
+            else:
+                self.position = None
+                self.__first = first
 
         @property
         def set(self) -> bool:
             return (
-                self.typeval.initialized
-                and isinstance(self.typeval.size, Number)
-                and isinstance(self.first, Number)
-                and isinstance(self.last, Number)
+                (self.pending is not None or self.typeval.initialized)
+                and self.position is not None
+                and self.length is not None
             )
 
+        @property
+        def size(self) -> Expr:
+            if self.pending is not None:
+                return Number(len(self.pending))
+            return self.typeval.size
+
+        @property
+        def length(self) -> Optional[int]:
+            """Return the size of the field in bits or None if the size is not known."""
+            if self.pending is not None:
+                return len(self.pending)
+            size = self.typeval.size
+            return size.value if isinstance(size, Number) else None
+
         @property
         def last(self) -> Expr:
-            return Sub(Add(self.first, self.typeval.size), Number(1)).simplified()
+            length = self.length
+            if self.position is not None and length is not None:
+                return Number(self.position + length - 1)
+            return Sub(Add(self.first, self.size), Number(1)).simplified()
+
+
+_SCHEMA_LOCK = RLock()
+
+_SCHEMAS: "WeakValueDictionary[Tuple[int, Tuple[int, ...]], MessageSchema]" = WeakValueDictionary()
+
+
+def message_schema(message: Message, refinements: Sequence[Refinement] = None) -> MessageSchema:
+    """Return the schema of a message with the given refinements, creating it on first use."""
+    if refinements is None:
+        refinements = ()
+    key = _schema_key(message, refinements)
+    schema = _SCHEMAS.get(key)
+    if schema is None:
+        with _SCHEMA_LOCK:
+            schema = _SCHEMAS.get(key)
+            if schema is None:
+                schema = MessageSchema(message, refinements)
+                _SCHEMAS[key] = schema
+    return schema
+
+
+def _schema_key(message: Message, refinements: Sequence[Refinement]) -> Tuple[int, Tuple[int, ...]]:
+    return id(message), tuple(map(id, refinements))
+
+
+def _nested_schema(
+    owner: Optional[TypeValue], message: Message, refinements: Sequence[Refinement]
+) -> MessageSchema:
+    """Return the schema of a nested message, which is kept by the schema of the owner."""
+    if isinstance(owner, MessageValue):
+        return owner.schema.nested_schema(message, refinements)
+    return message_schema(message, refinements)
+
+
+_TYPECODES = {array(typecode).itemsize: typecode for typecode in reversed("BHILQ")}
+
+
+def _unpack(data: bytes, size: int) -> Sequence[int]:
+    """Decode a sequence of big-endian unsigned integers of the given size in bytes."""
+    typecode = _TYPECODES.get(size)
+    if typecode is None:
+        return [int.from_bytes(data[i : i + size], "big") for i in range(0, len(data), size)]
+    values = array(typecode, data)
+    if size > 1 and sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+@lru_cache(maxsize=None)
+def _slots(cls: type) -> List[str]:
+    """Return the attribute names of all slots of a class and its base classes."""
+    return [
+        f"_{c.__name__.lstrip('_')}{s}" if s.startswith("__") else s
+        for c in reversed(cls.__mro__)
+        for s in c.__dict__.get("__slots__", ())
+    ]
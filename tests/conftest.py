@@ -1,9 +1,17 @@
+import os
 import re
-from typing import Sequence
+from typing import Any, Sequence
+
+import pytest
 
 from rflx.expression import Expr
 
 
+@pytest.fixture(name="cache_directory", scope="session", autouse=True)
+def fixture_cache_directory(tmp_path_factory: Any) -> None:
+    os.environ["RFLX_CACHE_DIR"] = str(tmp_path_factory.mktemp("cache"))
+
+
 def pytest_assertrepr_compare(op: str, left: object, right: object) -> Sequence[str]:
     if isinstance(left, Expr) and isinstance(right, Expr) and op == "==":
         return [
@@ -34,6 +34,10 @@ def test_main_check_quiet() -> None:
     assert cli.main(["rflx", "--quiet", "check", "specs/tlv.rflx"]) == 0
 
 
+def test_main_check_no_cache() -> None:
+    assert cli.main(["rflx", "--no-cache", "check", "specs/tlv.rflx"]) == 0
+
+
 def test_main_check_parser_error() -> None:
     assert "parser error: " in str(cli.main(["rflx", "check", "README.md"]))
 
@@ -1,5 +1,7 @@
 # pylint: disable=too-many-lines
 
+import os
+import pickle
 from itertools import zip_longest
 from pathlib import Path
 from typing import Any, Dict, Sequence
@@ -39,7 +41,7 @@ from rflx.model import (
     RangeInteger,
     Refinement,
 )
-from rflx.parser import grammar, parser
+from rflx.parser import ModelCache, grammar, parser
 from rflx.parser.ast import (
     ContextSpec,
     DerivationSpec,
@@ -50,6 +52,7 @@ from rflx.parser.ast import (
     Specification,
     Then,
 )
+from rflx.parser.cache import closure
 from rflx.parser.parser import Component, ParseFatalException, Parser, ParserError
 from tests.models import ETHERNET_FRAME
 from tests.utils import assert_equal
@@ -1226,3 +1229,108 @@ def test_feature_integration() -> None:
     p = Parser()
     p.parse(Path(f"{TESTDIR}/feature_integration.rflx"))
     p.create_model()
+
+
+def test_model_cache(tmp_path: Path, monkeypatch: Any) -> None:
+    specdir = tmp_path / "specs"
+    specdir.mkdir()
+    for name in ["ethernet", "ipv4", "in_ethernet"]:
+        (specdir / f"{name}.rflx").write_text(Path(f"specs/{name}.rflx").read_text())
+    files = [specdir / "in_ethernet.rflx"]
+    cache = ModelCache(tmp_path / "cache")
+    assert closure(files) == [
+        specdir / "in_ethernet.rflx",
+        specdir / "ethernet.rflx",
+        specdir / "ipv4.rflx",
+    ]
+
+    model = cache.create_model(files)
+    assert len(list((tmp_path / "cache").glob("*.pickle"))) == 1
+
+    monkeypatch.setattr("rflx.parser.cache.Parser", None)
+    cached_model = cache.create_model(files)
+    assert cached_model is not model
+    assert cached_model.types == model.types
+    monkeypatch.undo()
+
+    (specdir / "ipv4.rflx").write_text(
+        (specdir / "ipv4.rflx").read_text().replace("Fragment_Offset", "Offset")
+    )
+    changed_model = cache.create_model(files)
+    assert changed_model.types != model.types
+    assert len(list((tmp_path / "cache").glob("*.pickle"))) == 2
+
+    cache.clear()
+    assert not list((tmp_path / "cache").glob("*.pickle"))
+
+
+def test_model_cache_closure(tmp_path: Path) -> None:
+    for name in ["ethernet", "ipv4"]:
+        (tmp_path / f"{name}.rflx").write_text(Path(f"specs/{name}.rflx").read_text())
+    (tmp_path / "in_ethernet.rflx").write_text(
+        "-- with TLV;\n"
+        + Path("specs/in_ethernet.rflx")
+        .read_text()
+        .replace("with Ethernet;\nwith IPv4;", "with Ethernet; with IPv4;")
+    )
+    files = [tmp_path / "in_ethernet.rflx"]
+    assert "with Ethernet; with IPv4;" in files[0].read_text()
+    assert closure(files) == [
+        tmp_path / "in_ethernet.rflx",
+        tmp_path / "ethernet.rflx",
+        tmp_path / "ipv4.rflx",
+    ]
+    key = ModelCache(tmp_path / "cache").key(files)
+    (tmp_path / "ipv4.rflx").write_text(
+        (tmp_path / "ipv4.rflx").read_text().replace("Fragment_Offset", "Offset")
+    )
+    assert ModelCache(tmp_path / "cache").key(files) != key
+
+
+def test_model_cache_eviction(tmp_path: Path) -> None:
+    cache = ModelCache(tmp_path)
+    model = cache.create_model([Path("specs/tlv.rflx")])
+    cache.store("a", model)
+    cache.store("b", model)
+    size = (tmp_path / "a.pickle").stat().st_size
+    os.utime(tmp_path / "a.pickle", (0, 0))
+    os.utime(tmp_path / "b.pickle", (1, 1))
+    assert cache.load("a") is not None
+
+    cache.max_size = 2 * size
+    cache.store("c", model)
+    assert sorted(p.name for p in tmp_path.glob("*.pickle")) == ["a.pickle", "c.pickle"]
+
+
+def test_model_cache_insecure_entry(tmp_path: Path) -> None:
+    cache = ModelCache(tmp_path / "cache")
+    cache.store("a", cache.create_model([Path("specs/tlv.rflx")]))
+    assert (tmp_path / "cache").stat().st_mode & 0o777 == 0o700
+    assert cache.load("a") is not None
+    (tmp_path / "cache" / "a.pickle").chmod(0o666)
+    assert cache.load("a") is None
+    (tmp_path / "cache" / "a.pickle").chmod(0o600)
+    (tmp_path / "cache").chmod(0o770)
+    assert cache.load("a") is None
+
+
+def test_model_cache_touch_failure(tmp_path: Path, monkeypatch: Any) -> None:
+    cache = ModelCache(tmp_path)
+    model = cache.create_model([Path("specs/tlv.rflx")])
+    cache.store("a", model)
+
+    def utime(path: Path) -> None:
+        raise PermissionError(path)
+
+    monkeypatch.setattr("rflx.parser.cache.os.utime", utime)
+    assert cache.load("a") is not None
+
+
+def test_model_cache_invalid_entry(tmp_path: Path) -> None:
+    cache = ModelCache(tmp_path)
+    assert cache.load("a") is None
+    (tmp_path / "a.pickle").write_bytes(b"invalid")
+    assert cache.load("a") is None
+    with open(tmp_path / "b.pickle", "wb") as f:
+        pickle.dump("invalid", f)
+    assert cache.load("b") is None
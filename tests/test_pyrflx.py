@@ -1,36 +1,81 @@
 # pylint: disable=too-many-lines
 
+import asyncio
+import gc
 import itertools
+import pickle
+import socket
+import threading
+import weakref
+from copy import copy
 from pathlib import Path
-from typing import List
+from typing import Any, List
 
 import pytest
 
-from rflx.expression import UNDEFINED
+from rflx.expression import (
+    UNDEFINED,
+    Add,
+    Aggregate,
+    And,
+    Div,
+    Equal,
+    First,
+    Greater,
+    Last,
+    Length,
+    Less,
+    Mod,
+    Mul,
+    NotEqual,
+    Or,
+    Pow,
+    Sub,
+    Variable,
+)
 from rflx.identifier import ID
 from rflx.model import (
     FINAL,
     INITIAL,
     Array,
     Enumeration,
+    Field,
     ModularInteger,
     Number,
     Opaque,
     RangeInteger,
+    Refinement,
     Type,
 )
+from rflx.parser.parser import ParserError
 from rflx.pyrflx import (
     ArrayValue,
     Bitstring,
+    Classifier,
+    Complete,
     EnumValue,
+    Filter,
+    FrameStreamProtocol,
+    Framer,
+    IncrementalParser,
     IntegerValue,
+    MessageDatagramProtocol,
+    MessageSchema,
+    MessageStreamProtocol,
     MessageValue,
+    NeedMore,
     NotInitializedError,
     OpaqueValue,
     Package,
     PyRFLX,
     TypeValue,
+    read_frame,
+    read_message,
 )
+from rflx.pyrflx.bitstring import BitWriter
+from rflx.pyrflx.evaluator import Evaluator
+from rflx.pyrflx.plan import parse_plan
+from rflx.pyrflx.typevalue import message_schema
 
 TESTDIR = "tests"
 SPECDIR = "specs"
@@ -178,6 +223,49 @@ def test_file_not_found(tmp_path: Path) -> None:
         PyRFLX([f"{tmp_path}/test.rflx"])
 
 
+def test_selected_packages() -> None:
+    pyrflx = PyRFLX(
+        [
+            f"{SPECDIR}/ethernet.rflx",
+            f"{SPECDIR}/in_ethernet.rflx",
+            f"{SPECDIR}/ipv4.rflx",
+            f"{SPECDIR}/tlv.rflx",
+        ],
+        ["In_Ethernet"],
+    )
+    with pytest.raises(KeyError):
+        pyrflx["TLV"]  # pylint: disable=pointless-statement
+    assert pyrflx["Ethernet"] is pyrflx["Ethernet"]
+    frame = pyrflx["Ethernet"]["Frame"]
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        frame.parse(file.read())
+    assert isinstance(frame.get("Payload"), MessageValue)
+
+    with pytest.raises(ValueError, match=r'^package not found: "UDP"$'):
+        PyRFLX([f"{SPECDIR}/tlv.rflx"], ["TLV", "UDP"])
+
+
+def test_package_lazy_templates(tlv_package: Package) -> None:
+    # pylint: disable=protected-access
+    message = tlv_package["Message"]
+    package = Package("TLV", [message._type])
+    assert repr(package).count("MessageValue") == 0
+    assert package["Message"] == message
+    assert repr(package).count("MessageValue") > 0
+    assert [m.name for m in package] == ["Message"]
+    with pytest.raises(KeyError):
+        package["Foo"]  # pylint: disable=pointless-statement
+
+
+def test_no_cache(tmp_path: Path, monkeypatch: Any) -> None:
+    monkeypatch.setenv("RFLX_CACHE_DIR", str(tmp_path))
+    pyrflx = PyRFLX([f"{SPECDIR}/tlv.rflx"], cache=False)
+    assert isinstance(pyrflx["TLV"]["Message"], MessageValue)
+    assert not list(tmp_path.iterdir())
+    PyRFLX([f"{SPECDIR}/tlv.rflx"])
+    assert len(list(tmp_path.iterdir())) == 1
+
+
 def test_package_name() -> None:
     p = Package("Test")
     assert p.name == "Test"
@@ -202,6 +290,24 @@ def test_message_eq(tlv_package: Package) -> None:
     assert m1 is not None
 
 
+def test_message_copy(array_message_package: Package) -> None:
+    m1 = array_message_package["Message"]
+    m1.parse(b"\x02\x05\x06")
+    assert m1.valid_message
+    m2 = array_message_package["Message"]
+    assert m2.valid_fields == []
+    assert m2.accessible_fields == ["Length"]
+    m2.parse(b"\x01\x07")
+    assert m2.valid_message
+    assert m1.bytestring == b"\x02\x05\x06"
+    m3 = copy(m1)
+    assert m3 == array_message_package["Message"]
+    assert m3.accessible_fields == ["Length"]
+    m3.parse(b"\x01\x08")
+    assert m3.bytestring == b"\x01\x08"
+    assert m2.bytestring == b"\x01\x07"
+
+
 def test_attributes(pyrflx: PyRFLX) -> None:
     pyrflx = PyRFLX([f"{TESTDIR}/tlv_with_checksum.rflx"])
     assert isinstance(pyrflx["TLV_With_Checksum"], Package)
@@ -243,6 +349,18 @@ def test_accessible_fields_error_reset_fields(tlv_checksum: MessageValue) -> Non
     assert tlv_checksum.accessible_fields == ["Tag"]
 
 
+def test_set_fields_moved_field(tlv_checksum: MessageValue) -> None:
+    tlv_checksum.set_fields({"Tag": "Msg_Data", "Length": 1, "Value": b"\x01", "Checksum": 0})
+    assert tlv_checksum.valid_message
+    with pytest.raises(KeyError, match=r"^'cannot access field Checksum'$"):
+        tlv_checksum.set_fields({"Length": 2, "Checksum": 5})
+    assert not tlv_checksum.valid_message
+    assert tlv_checksum.valid_fields == ["Tag", "Length"]
+    tlv_checksum.set_fields({"Value": b"\x01\x02", "Checksum": 5})
+    assert tlv_checksum.valid_message
+    assert tlv_checksum.bytestring == b"\x40\x02\x01\x02\x00\x00\x00\x05"
+
+
 def test_accessible_fields_fields_complex(tlv_checksum: MessageValue) -> None:
     assert tlv_checksum.accessible_fields == ["Tag"]
     tlv_checksum.set("Tag", "Msg_Error")
@@ -619,6 +737,8 @@ def test_value_mod() -> None:
         modvalue.assign(2 ** 16)
     with pytest.raises(ValueError, match=r"value -1 not in type range 0 .. 65535"):
         modvalue.assign(-1)
+    modvalue.assign(2 ** 16, False)
+    assert modvalue.value == 2 ** 16
 
 
 def test_value_range() -> None:
@@ -638,6 +758,13 @@ def test_value_range() -> None:
         rangevalue.assign(17)
     with pytest.raises(ValueError, match=r"value 7 not in type range 8 .. 16"):
         rangevalue.assign(7)
+    with pytest.raises(ValueError, match=r"value 17 not in type range 8 .. 16"):
+        rangevalue.assign(17, False)
+    rangevalue = IntegerValue(RangeInteger("Test.Int", Number(0), Number(255), Number(8)))
+    with pytest.raises(ValueError, match=r"value 256 not in type range 0 .. 255"):
+        rangevalue.assign(256)
+    rangevalue.assign(256, False)
+    assert rangevalue.value == 256
 
 
 def test_value_enum() -> None:
@@ -657,6 +784,15 @@ def test_value_enum() -> None:
         enumvalue.assign("Three")
     with pytest.raises(KeyError, match=r"Number 15 is not a valid enum value"):
         enumvalue.parse(Bitstring("1111"))
+    enumvalue.parse(Bitstring("10"))
+    assert enumvalue.value == "Two"
+    assert enumvalue.literals == {Variable("One"): Number(1), Variable("Two"): Number(2)}
+    enumvalue = EnumValue(
+        Enumeration("Test.Enum", {"One": Number(1), "Two": Number(2)}, Number(8), True)
+    )
+    enumvalue.parse(Bitstring("1111"))
+    assert enumvalue.value == "UNKNOWN"
+    assert str(enumvalue.bitstring) == "00001111"
 
 
 def test_value_opaque() -> None:
@@ -729,6 +865,23 @@ def test_field_eq() -> None:
     assert f1 is not None
 
 
+def test_field_eq_pending() -> None:
+    rangetype = RangeInteger("Test.Int", Number(8), Number(16), Number(8))
+    f1 = MessageValue.Field(IntegerValue(rangetype))
+    f2 = MessageValue.Field(IntegerValue(rangetype))
+    f1.pending = Bitstring("00000010")
+    f2.pending = Bitstring("00000010")
+    assert f1 == f2
+    assert f1.pending is not None and f2.pending is not None
+    f2.pending = Bitstring("00000011")
+    assert f1 != f2
+    f1.pending = Bitstring("00001010")
+    f2.pending = None
+    f2.typeval.assign(10)
+    assert f1 == f2
+    assert f1.pending is not None
+
+
 def test_field_set() -> None:
     f = MessageValue.Field(OpaqueValue(Opaque()))
     assert not f.set
@@ -736,6 +889,31 @@ def test_field_set() -> None:
     assert not f.set
     f.first = Number(1)
     assert f.set
+    assert f.position == 1
+    assert f.last == Number(8)
+    f.first = Add(First("X"), Number(1))
+    assert not f.set
+    assert f.position is None
+    assert f.first == Add(First("X"), Number(1))
+    assert not isinstance(f.last, Number)
+
+
+def test_field_state_invalidation(tlv: MessageValue) -> None:
+    assert tlv.accessible_fields == ["Tag"]
+    tlv.set("Tag", "Msg_Data")
+    tlv.set("Length", 1)
+    tlv.set("Value", b"\x01")
+    assert tlv.valid_fields == ["Tag", "Length", "Value"]
+    assert tlv.valid_message
+    tlv.set("Length", 2)
+    assert tlv.valid_fields == ["Tag", "Length"]
+    assert tlv.required_fields == ["Value"]
+    tlv.set("Tag", "Msg_Error")
+    assert tlv.accessible_fields == ["Tag"]
+    assert tlv.valid_message
+    tlv.set("Tag", "Msg_Data")
+    assert tlv.accessible_fields == ["Tag", "Length", "Value"]
+    assert tlv.valid_fields == ["Tag", "Length"]
 
 
 def test_get_first_unchecked_undefined(tlv_checksum: MessageValue) -> None:
@@ -753,6 +931,114 @@ def test_check_nodes_opaque(tlv_checksum: MessageValue, frame: MessageValue) ->
     assert not frame._is_valid_opaque_field("Payload")
 
 
+def test_parse_plan(frame: MessageValue, tlv: MessageValue) -> None:
+    # pylint: disable=protected-access
+    plan = parse_plan(frame._type)
+    assert plan is parse_plan(frame._type)
+    successor = plan.initial.successor
+    assert successor is not None
+    assert (successor.target, successor.first, successor.length) == ("Destination", 0, 48)
+    assert [(l.target, l.first, l.length) for l in plan.steps["Type_Length_TPID"].links] == [
+        ("TPID", 96, 16),
+        ("Type_Length", 96, 16),
+    ]
+    assert [(l.target, l.first, l.length) for l in plan.steps["Type_Length"].links] == [
+        ("Payload", None, None),
+        ("Payload", None, None),
+    ]
+    assert plan.steps["Type_Length_TPID"].dispatch is None
+    tag = parse_plan(tlv._type).steps["Tag"]
+    assert tag.successor is None
+    assert tag.dispatch is not None
+    assert {k: l.target for k, l in tag.dispatch.items()} == {
+        "Msg_Data": "Length",
+        "Msg_Error": "Final",
+    }
+
+
+def test_refinement_index(
+    frame: MessageValue, ipv4: MessageValue, udp: MessageValue, tlv: MessageValue
+) -> None:
+    # pylint: disable=protected-access
+    plan = parse_plan(frame._type)
+    index = plan.refinement_index(frame._refinements)
+    assert index is plan.refinement_index(frame._refinements)
+    assert index.refinements.keys() == {"Payload"}
+    sdu = index.refined_message("Payload", {"Type_Length": 0x0800})
+    assert sdu is not None and sdu.identifier == ipv4.identifier
+    assert index.refined_message("Payload", {"Type_Length": 0x86DD}) is None
+    assert index.refined_message("Payload", {}) is None
+
+    plan = parse_plan(tlv._type)
+    index = plan.refinement_index(
+        [
+            Refinement(
+                "P",
+                tlv._type,
+                Field("Value"),
+                ipv4._type,
+                Equal(Variable("Tag"), Variable("Msg_Data")),
+            ),
+            Refinement(
+                "P",
+                tlv._type,
+                Field("Value"),
+                udp._type,
+                Equal(Variable("Msg_Error"), Variable("Tag")),
+            ),
+        ]
+    )
+    assert index.refined_message("Value", {"Tag": plan.literals["Msg_Data"]}) is ipv4._type
+    assert index.refined_message("Value", {"Tag": plan.literals["Msg_Error"]}) is udp._type
+    index = plan.refinement_index(
+        [
+            Refinement(
+                "P", tlv._type, Field("Value"), ipv4._type, Greater(Variable("Length"), Number(20))
+            ),
+            Refinement(
+                "P", tlv._type, Field("Value"), udp._type, Less(Variable("Length"), Number(10))
+            ),
+            Refinement(
+                "P", tlv._type, Field("Value"), tlv._type, Equal(Variable("Length"), Number(5))
+            ),
+        ]
+    )
+    assert index.refined_message("Value", {"Length": 30}) is ipv4._type
+    assert index.refined_message("Value", {"Length": 15}) is None
+    assert index.refined_message("Value", {"Length": 5}) is tlv._type
+
+
+def test_evaluator() -> None:
+    env = {"X": 6, "X'First": 8, "X'Length": 16, "X'Last": 23}
+    assert Evaluator(Add(Variable("X"), Mul(Number(2), Number(3)), -Variable("X")))(env) == 6
+    assert Evaluator(Sub(Last("X"), First("X")))(env) == 15
+    assert Evaluator(Pow(Variable("X"), Number(2)))(env) == 36
+    assert Evaluator(Mod(Length("X"), Number(5)))(env) == 1
+    assert Evaluator(Div(Length("X"), Number(8)))(env) == 2
+    assert Evaluator(Div(Length("X"), Number(3)))(env) is None
+    assert Evaluator(Add(Variable("X"), Variable("Y")))(env) is None
+    assert Evaluator(Less(Variable("X"), Number(7)))(env) is True
+    assert Evaluator(Greater(Variable("Y"), Number(7)))(env) is None
+    assert Evaluator(Equal(Variable("Y"), Variable("Y")))(env) is True
+    assert Evaluator(NotEqual(Variable("X"), Variable("Lit")), {"Lit": 6})(env) is False
+    assert (
+        Evaluator(And(Less(Variable("Y"), Number(1)), Less(Variable("X"), Number(1))))(env) is False
+    )
+    assert (
+        Evaluator(And(Less(Variable("Y"), Number(1)), Less(Variable("X"), Number(7))))(env) is None
+    )
+    assert (
+        Evaluator(Or(Less(Variable("Y"), Number(1)), Less(Variable("X"), Number(7))))(env) is True
+    )
+    assert Evaluator(Aggregate(Number(1), Variable("X")))(env) == (1, 6)
+    assert Evaluator(Add(First("X"), Length("Y"), Variable("Z"))).names == {
+        "X'First",
+        "Y'Length",
+        "Z",
+    }
+    assert Evaluator(UNDEFINED)(env) is None
+
+
 def test_icmp_parse_binary(echo_request_reply_message: MessageValue) -> None:
     test_bytes = (
         b"\x08\x00\xe1\x1e\x00\x11\x00\x01\x4a\xfc\x0d\x00\x00\x00\x00\x00"
@@ -815,6 +1101,26 @@ def test_bitstring(tlv_checksum: MessageValue) -> None:
     assert not tlv_checksum.valid_message
 
 
+def test_bitstring_view() -> None:
+    bits = Bitstring.from_bytes(b"\x0f\xf0\xaa")
+    assert len(bits) == 24
+    assert str(bits) == "000011111111000010101010"
+    assert int(bits[4:12]) == 0xFF
+    assert bits[4:12] == Bitstring("11111111")
+    assert bytes(bits[8:24]) == b"\xf0\xaa"
+    assert bytes(bits[4:12]) == b"\xff"
+    assert bytes(bits[0:12]) == b"\x0f\x0f"
+    assert int(bits[4:12][2:5]) == 0b111
+    assert str(bits[23]) == "0"
+    assert str(bits[-1]) == "0"
+    assert len(bits[24:]) == 0
+    assert int(Bitstring()) == 0
+    with pytest.raises(IndexError):
+        bits[20:25]  # pylint: disable=pointless-statement
+    assert Bitstring.from_int(5, 4) == Bitstring("0101")
+    assert Bitstring.join([bits[0:4], Bitstring("1"), bits[20:24]]) == Bitstring("000011010")
+
+
 def test_odd_length_binary(message_odd_length: MessageValue) -> None:
     test_bytes = b"\x01\x02\x01\xff\xb8"
     message_odd_length.parse(test_bytes)
@@ -833,6 +1139,23 @@ def test_array_nested_messages(array_message_package: Package, array_message: Me
     assert array_message.bytestring == b"\x02\x05\x06"
 
 
+def test_array_nested_messages_parse(array_message: MessageValue) -> None:
+    data = b"\xff" + bytes(range(255))
+    array_message.parse(data)
+    assert array_message.valid_message
+    bar = array_message.get("Bar")
+    assert isinstance(bar, list)
+    assert len(bar) == 255
+    assert all(isinstance(m, MessageValue) and m.get("Byte") == i for i, m in enumerate(bar))
+    assert array_message.size == Number(len(data) * 8)
+    assert array_message.bytestring == data
+    array_message.parse(b"\x02\x05\x06")
+    bar = array_message.get("Bar")
+    assert isinstance(bar, list)
+    assert [m.get("Byte") for m in bar if isinstance(m, MessageValue)] == [5, 6]
+    assert array_message.bytestring == b"\x02\x05\x06"
+
+
 def test_array_nested_values(array_type_foo: MessageValue) -> None:
     a = IntegerValue(ModularInteger("Array_Type.Byte_One", Number(256)))
     b = IntegerValue(ModularInteger("Array_Type.Byte_Two", Number(256)))
@@ -869,6 +1192,55 @@ def test_array_parse_from_bytes(array_message: MessageValue, array_type_foo: Mes
     assert array_type_foo.bytestring == b"\x03\x05\x06\x07"
 
 
+def test_array_parse_scalars() -> None:
+    # pylint: disable=protected-access
+    mod_array = ArrayValue(Array("Test.Array", ModularInteger("Test.Mod_Int", Number(2 ** 16))))
+    mod_array.parse(b"\x00\x01\x13\x01\xff\xff")
+    assert mod_array._raw is not None
+    assert list(mod_array.raw) == [1, 0x1301, 0xFFFF]
+    assert mod_array.size == Number(48)
+    assert mod_array.bitstring == Bitstring.from_bytes(b"\x00\x01\x13\x01\xff\xff")
+    assert [v.value for v in mod_array.value] == [1, 0x1301, 0xFFFF]
+    assert mod_array._raw is None
+    assert list(mod_array.raw) == [1, 0x1301, 0xFFFF]
+    assert mod_array.bitstring == Bitstring.from_bytes(b"\x00\x01\x13\x01\xff\xff")
+
+    wide_array = ArrayValue(Array("Test.Array", ModularInteger("Test.Mod_Int", Number(2 ** 24))))
+    wide_array.parse(b"\x01\x02\x03\x04\x05\x06")
+    assert list(wide_array.raw) == [0x010203, 0x040506]
+
+    range_array = ArrayValue(
+        Array("Test.Array", RangeInteger("Test.Range_Int", Number(1), Number(100), Number(8)))
+    )
+    range_array.parse(b"\x01\x64")
+    assert [v.value for v in range_array.value] == [1, 100]
+    with pytest.raises(ValueError, match=r"^value 101 not in type range 1 \.\. 100$"):
+        range_array.parse(b"\x01\x65\x00")
+
+    enum_array = ArrayValue(
+        Array(
+            "Test.Array",
+            Enumeration(
+                "Test.Enum", {"something": Number(1), "other": Number(2)}, Number(8), False
+            ),
+        )
+    )
+    enum_array.parse(b"\x02\x01")
+    assert [v.value for v in enum_array.value] == ["other", "something"]
+    with pytest.raises(KeyError, match=r"^'Number 3 is not a valid enum value'$"):
+        enum_array.parse(b"\x01\x03")
+
+    always_valid_enum_array = ArrayValue(
+        Array(
+            "Test.Array",
+            Enumeration("Test.Enum", {"something": Number(1), "other": Number(2)}, Number(8), True),
+        )
+    )
+    always_valid_enum_array.parse(b"\x02\x03")
+    assert [v.value for v in always_valid_enum_array.value] == ["other", "UNKNOWN"]
+    assert always_valid_enum_array.bitstring == Bitstring.from_bytes(b"\x02\x03")
+
+
 def test_array_assign_incorrect_values(
     tlv: MessageValue, frame: MessageValue, array_type_foo: MessageValue
 ) -> None:
@@ -949,6 +1321,543 @@ def test_incorrect_nested_message(frame: MessageValue) -> None:
         "stopped while parsing field: Payload",
     ):
         frame.parse(incorrect_message)
+    assert frame.validate(incorrect_message) == (False, "Payload.Payload", 304)
+
+
+def test_parse_projection(frame: MessageValue, ipv4: MessageValue) -> None:
+    # pylint: disable=protected-access
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    frame.parse(msg_as_bytes, fields=["Destination", "Type_Length"])
+    assert frame.get("Destination") == int("FFFFFFFFFFFF", 16)
+    assert frame.get("Type_Length") == int("0800", 16)
+    assert frame._fields["Source"].pending is not None
+    assert not frame._fields["Payload"].set
+    assert frame.valid_fields == ["Destination", "Source", "Type_Length_TPID", "Type_Length"]
+    assert frame.required_fields == ["Payload"]
+    assert not frame.valid_message
+
+    ipv4.parse(msg_as_bytes[14:], fields=["Protocol"])
+    assert ipv4.get("Protocol") == "PROTOCOL_UDP"
+    assert ipv4._fields["TTL"].pending is not None
+    assert not ipv4._fields["Payload"].set
+
+    with pytest.raises(KeyError, match=r"^'unknown field X'$"):
+        ipv4.parse(msg_as_bytes[14:], fields=["X"])
+
+
+def test_incremental_parser(tlv: MessageValue, frame: MessageValue) -> None:
+    parser = IncrementalParser(tlv)
+    assert isinstance(parser.feed(b""), NeedMore)
+    result = parser.feed(b"\x40")
+    assert isinstance(result, NeedMore) and result.bits == 8
+    assert parser.message.get("Tag") == "Msg_Data"
+    result = parser.feed(b"\x04\x00")
+    assert isinstance(result, NeedMore) and result.bits == 24
+    assert parser.message.get("Length") == 4
+    result = parser.feed(b"\x00\x00\x00\xc0")
+    assert isinstance(result, Complete) and result.bits_consumed == 48
+    assert result.message.valid_message
+    assert result.message.get("Value") == b"\x00\x00\x00\x00"
+    assert parser.buffered == 1
+    result = parser.feed(b"")
+    assert isinstance(result, Complete) and result.bits_consumed == 2
+    assert result.message.get("Tag") == "Msg_Error"
+    assert parser.buffered == 0
+    assert isinstance(parser.feed(b""), NeedMore)
+    assert tlv.valid_fields == []
+
+    with pytest.raises(
+        ValueError,
+        match=r"^Error while setting value for field Tag: 'Number 0 is not a valid enum value'$",
+    ):
+        parser.feed(b"\x00\x00")
+    assert parser.buffered == 0
+
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    parser = IncrementalParser(frame)
+    for i in range(0, len(msg_as_bytes), 10):
+        result = parser.feed(msg_as_bytes[i : i + 10])
+        assert isinstance(result, NeedMore)
+    assert isinstance(result, NeedMore) and result.bits is None
+    result = parser.finish()
+    assert isinstance(result, Complete) and result.bits_consumed == len(msg_as_bytes) * 8
+    assert result.message.bytestring == msg_as_bytes
+    frame.parse(msg_as_bytes)
+    assert result.message.get("Payload") == frame.get("Payload")
+
+
+def test_framer(tls_record: MessageValue, ipv4: MessageValue, frame: MessageValue) -> None:
+    # pylint: disable=protected-access
+    framer = Framer(tls_record._type)
+    record = b"\x16\x03\x03\x00\x04\x01\x02\x03\x04"
+    result = framer.length(b"")
+    assert isinstance(result, NeedMore) and result.bits == 8
+    result = framer.length(record[:3])
+    assert isinstance(result, NeedMore) and result.bits == 16
+    assert framer.length(record[:5]) == 72
+    assert framer.length(record) == 72
+    with pytest.raises(ValueError, match=r"^invalid value 25 of field Tag$"):
+        framer.length(b"\x19\x03\x03\x00\x04")
+    assert list(framer.frames([record[:2], record[2:7], record[7:] + record, record[:4]])) == [
+        record,
+        record,
+    ]
+    assert framer.split(record + record[:4]) == ([record], 9)
+    assert framer.split(bytearray(record[:4])) == ([], 0)
+    assert list(framer.frames(record[i : i + 1] for i in range(len(record)))) == [record]
+
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    packet = msg_as_bytes[14:]
+    ipv4.parse(packet)
+    assert Framer(ipv4._type).length(packet[:20]) == ipv4.size.value
+
+    with pytest.raises(
+        ValueError,
+        match=r"^length of Ethernet.Frame is not determined by its fields:"
+        r" field Payload has no specified length$",
+    ):
+        Framer(frame._type).length(msg_as_bytes)
+
+
+class PausableTransport(asyncio.Transport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reading = True
+        self.closed = False
+
+    def pause_reading(self) -> None:
+        self.reading = False
+
+    def resume_reading(self) -> None:
+        self.reading = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+TLV_DATA = b"\x40\x04\x00\x00\x00\x00"
+TLV_ERROR = b"\xc0"
+
+
+def test_message_stream_protocol(tlv: MessageValue) -> None:
+    async def receive_all() -> List[MessageValue]:
+        rsock, wsock = socket.socketpair()
+        _, protocol = await loop.create_connection(lambda: MessageStreamProtocol(tlv), sock=rsock)
+        with wsock:
+            wsock.sendall(TLV_DATA[:3])
+            await asyncio.sleep(0.01)
+            wsock.sendall(TLV_DATA[3:] + TLV_ERROR + TLV_DATA)
+        return [m async for m in protocol]
+
+    loop = asyncio.new_event_loop()
+    try:
+        messages = loop.run_until_complete(receive_all())
+    finally:
+        loop.close()
+    assert [m.bytestring for m in messages] == [TLV_DATA, TLV_ERROR, TLV_DATA]
+    assert all(m.valid_message for m in messages)
+
+
+def test_message_stream_protocol_backpressure(tlv: MessageValue) -> None:
+    async def receive() -> None:
+        transport = PausableTransport()
+        protocol = MessageStreamProtocol(tlv, max_items=2, max_buffer=8)
+        protocol.connection_made(transport)
+        protocol.data_received(TLV_DATA)
+        assert transport.reading
+        protocol.data_received(TLV_ERROR + TLV_ERROR)
+        assert not transport.reading
+        assert (await protocol.get()).bytestring == TLV_DATA
+        assert not transport.reading
+        assert (await protocol.get()).bytestring == TLV_ERROR
+        assert transport.reading
+        protocol.data_received(b"\x7f\xff" + bytes(8))
+        assert transport.closed
+        assert (await protocol.get()).bytestring == TLV_ERROR
+        with pytest.raises(BufferError, match=r"^buffered data exceeds 8 bytes$"):
+            await protocol.get()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(receive())
+    finally:
+        loop.close()
+
+
+def test_frame_stream_protocol(tls_record: MessageValue) -> None:
+    # pylint: disable=protected-access
+    record = b"\x16\x03\x03\x00\x04\x01\x02\x03\x04"
+
+    async def receive() -> List[bytes]:
+        rsock, wsock = socket.socketpair()
+        _, protocol = await loop.create_connection(
+            lambda: FrameStreamProtocol(Framer(tls_record._type)), sock=rsock
+        )
+        with wsock:
+            wsock.sendall(record + record[:4])
+            await asyncio.sleep(0.01)
+            wsock.sendall(record[4:])
+        return [f async for f in protocol]
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(receive()) == [record, record]
+    finally:
+        loop.close()
+
+
+def test_message_datagram_protocol(tlv: MessageValue) -> None:
+    async def receive() -> None:
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: MessageDatagramProtocol(tlv, max_items=2), local_addr=("127.0.0.1", 0)
+        )
+        address = transport.get_extra_info("sockname")
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            for data in [TLV_DATA, b"\x00", TLV_ERROR, TLV_DATA]:
+                sock.sendto(data, address)
+            for _ in range(100):
+                if protocol.invalid + protocol.dropped == 2:
+                    break
+                await asyncio.sleep(0.01)
+            message, sender = await protocol.get()
+            assert message.bytestring == TLV_DATA
+            assert sender == sock.getsockname()
+            protocol.error_received(ConnectionRefusedError())
+            message, _ = await protocol.get()
+            assert message.bytestring == TLV_ERROR
+        transport.close()
+        with pytest.raises(EOFError):
+            await protocol.get()
+        assert protocol.invalid == 1
+        assert protocol.dropped == 1
+        assert protocol.errors == 1
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(receive())
+    finally:
+        loop.close()
+
+
+def test_read_message(tlv: MessageValue, tls_record: MessageValue) -> None:
+    # pylint: disable=protected-access
+    record = b"\x16\x03\x03\x00\x04\x01\x02\x03\x04"
+
+    async def receive() -> None:
+        rsock, wsock = socket.socketpair()
+        reader, writer = await asyncio.open_connection(sock=rsock)
+        with wsock:
+            wsock.sendall(TLV_DATA + TLV_ERROR + record + record[:3])
+            parser = IncrementalParser(tlv)
+            assert (await read_message(reader, parser)).bytestring == TLV_DATA
+            assert (await read_message(reader, parser)).bytestring == TLV_ERROR
+            framer = Framer(tls_record._type)
+            assert await read_frame(reader, framer) == record
+        with pytest.raises(asyncio.IncompleteReadError):
+            await read_frame(reader, framer)
+        writer.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(receive())
+    finally:
+        loop.close()
+
+
+def test_classifier(pyrflx: PyRFLX) -> None:
+    classifier = pyrflx.classifier(
+        ["TLS_Alert.Alert", "TLS_Record.TLS_Record", "TLV.Message", "IPv4.Packet"]
+    )
+    alert, record, tlv, ipv4 = classifier.messages
+
+    assert classifier.classify(b"\x02\x28") == [alert]
+    assert classifier.candidates(b"\x02\x28") == [alert]
+    assert classifier.classify(b"\x15\x03\x03\x00\x02\x02\x28") == [record]
+    assert classifier.candidates(b"\x15\x03\x03\x00\x02\x02\x28") == [record]
+    assert classifier.classify(b"\x40\x04\x00\x00\x00\x00") == [tlv]
+    assert classifier.candidates(b"\x40\x04\x00\x00\x00\x00") == [tlv]
+    assert classifier.classify(b"\x03\x00") == []
+    assert classifier.classify(b"") == []
+
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    assert classifier.classify(msg_as_bytes[14:]) == [ipv4]
+    assert classifier.candidates(msg_as_bytes[14:]) == [tlv, ipv4]
+
+    assert Classifier([alert, alert]).classify(b"\x02\x28") == [alert, alert]
+
+    with pytest.raises(KeyError, match=r"^'unknown message TLV.X'$"):
+        pyrflx.classifier(["TLV.X"])
+
+
+def test_serialization_cache(frame: MessageValue) -> None:
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    frame.parse(msg_as_bytes)
+    assert frame.bytestring == msg_as_bytes
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    udp = ipv4.get("Payload")
+    assert isinstance(udp, MessageValue)
+    bytestring = frame.bytestring
+    assert frame.bytestring is bytestring
+    assert frame.bitstring is frame.bitstring
+    assert frame.size == Number(len(msg_as_bytes) * 8)
+
+    payload = udp.get("Payload")
+    assert isinstance(payload, bytes)
+    udp.set("Payload", payload[:-1] + b"\xff")
+    assert frame.bytestring == msg_as_bytes[:-1] + b"\xff"
+    assert ipv4.bytestring == msg_as_bytes[14:-1] + b"\xff"
+    assert frame.bytestring is frame.bytestring
+
+    udp.set("Checksum", 0)
+    assert udp.size == Number(64)
+    assert ipv4.size == Number(224)
+    assert frame.size == Number(336)
+    assert len(frame.bytestring) == 42
+
+    version = frame.version
+    udp.set("Checksum", 1)
+    assert frame.version > version
+
+    frame.parse(msg_as_bytes)
+    assert frame.bytestring == msg_as_bytes
+
+
+def test_serialization_cache_array(array_type_foo: MessageValue) -> None:
+    array_type_foo.parse(b"\x03\x05\x06\x07")
+    assert array_type_foo.bytestring == b"\x03\x05\x06\x07"
+    elements = array_type_foo.get("Bytes")
+    assert isinstance(elements, list)
+    elements[1].assign(42)
+    assert array_type_foo.bytestring == b"\x03\x05\x2a\x07"
+    assert array_type_foo.bytestring is array_type_foo.bytestring
+
+
+def test_bit_writer() -> None:
+    writer = BitWriter()
+    writer.write(Bitstring("101"))
+    writer.write(Bitstring.from_bytes(b"\xff\x00"))
+    writer.write(Bitstring("0110"))
+    assert len(writer) == 23
+    assert writer.bitstring == Bitstring("101" + "1111111100000000" + "0110")
+    writer.truncate(5)
+    assert writer.bitstring == Bitstring("10111")
+    writer.write(Bitstring.from_bytes(b"\x0f")[2:6])
+    assert writer.bitstring == Bitstring("101110011")
+
+
+def test_message_schema(frame: MessageValue, ipv4: MessageValue) -> None:
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    schema = frame.schema
+    assert isinstance(schema, MessageSchema)
+    assert copy(frame).schema is schema
+    assert MessageValue(frame._type, frame._refinements).schema is schema
+    assert MessageValue(frame._type, list(frame._refinements)).schema is schema
+    assert schema.new_message() == copy(frame)
+    assert schema.new_message() is not schema.new_message()
+
+    message = schema.new_message()
+    message.parse(msg_as_bytes)
+    nested = message.get("Payload")
+    assert isinstance(nested, MessageValue)
+    assert nested.schema is ipv4.schema
+    restored = pickle.loads(pickle.dumps(message))
+    assert restored == message
+    assert restored.bytestring == msg_as_bytes
+
+    frame_schema, ipv4_schema = pickle.loads(pickle.dumps([schema, ipv4.schema]))
+    assert frame_schema.prototype.schema is frame_schema
+    assert message_schema(frame_schema.message, frame_schema.refinements) is frame_schema
+    message = frame_schema.new_message()
+    message.parse(msg_as_bytes)
+    nested = message.get("Payload")
+    assert isinstance(nested, MessageValue)
+    assert nested.schema is ipv4_schema
+    assert message.bytestring == msg_as_bytes
+
+
+def test_message_schema_lifetime() -> None:
+    pyrflx = PyRFLX([f"{SPECDIR}/in_ethernet.rflx"])
+    frame = pyrflx["Ethernet"]["Frame"]
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        frame.parse(file.read())
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    references: List["weakref.ref[Any]"] = [
+        weakref.ref(frame.schema),
+        weakref.ref(ipv4.schema),
+        weakref.ref(frame.schema.plan),
+        weakref.ref(ipv4.schema.plan),
+        weakref.ref(ipv4.schema.plan.steps["TTL"].scalar),
+    ]
+    del pyrflx, frame, ipv4
+    gc.collect()
+    assert all(r() is None for r in references)
+
+
+def test_message_schema_threads(frame: MessageValue) -> None:
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    errors: List[Exception] = []
+
+    def parse() -> None:
+        try:
+            for _ in range(50):
+                message = copy(frame)
+                message.parse(msg_as_bytes)
+                assert message.valid_message
+                assert message.bytestring == msg_as_bytes
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    threads = [threading.Thread(target=parse) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert copy(frame) == frame.schema.prototype
+
+
+def test_validate(frame: MessageValue, ipv4: MessageValue) -> None:
+    for raw, result in [
+        ("ethernet_ipv4_udp", (True, None, 480)),
+        ("ethernet_vlan_tag", (True, None, 520)),
+        ("ethernet_invalid_too_short", (False, "Payload", 112)),
+        ("ethernet_undefined", (False, "Type_Length", 96)),
+    ]:
+        with open(f"{TESTDIR}/{raw}.raw", "rb") as file:
+            assert frame.validate(file.read()) == result
+    assert not frame.valid_fields
+    assert ipv4.validate(b"\x55" + bytes(19)) == (False, "Version", 0)
+
+
+def test_filter(frame: MessageValue) -> None:
+    # pylint: disable=protected-access
+    buffers = []
+    for raw in ["ethernet_ipv4_udp", "ethernet_vlan_tag", "ethernet_802.3", "ethernet_undefined"]:
+        with open(f"{TESTDIR}/{raw}.raw", "rb") as file:
+            buffers.append(file.read())
+    for condition, matches in [
+        ("Type_Length = 16#0800# and TTL < 5", []),
+        ("Type_Length = 16#0800# and TTL = 64", [0, 1]),
+        ("Protocol = IPv4.PROTOCOL_UDP and Destination_Port = 53", [0]),
+        ("Type_Length <= 1500", [2]),
+        ("Type_Length_TPID /= 16#8100# or TPID = 16#8100#", [0, 1, 2, 3]),
+        ("Type_Length'First = 128", [1]),
+    ]:
+        f = Filter(frame._type, condition, frame._refinements)
+        assert list(f.filter(buffers)) == [buffers[i] for i in matches], condition
+    with pytest.raises(ParserError):
+        Filter(frame._type, "Type_Length = ")
+    with pytest.raises(ValueError, match=r"^unknown name in condition: TLL, X$"):
+        Filter(frame._type, "Type_Length = 16#0800# and (TLL = 64 or X'Length > 8)")
+    with pytest.raises(
+        ValueError, match=r"^unknown name in condition: IPv4.PROTOCOL_UDP, Protocol$"
+    ):
+        Filter(frame._type, "Protocol = IPv4.PROTOCOL_UDP")
+    with pytest.raises(ValueError, match=r"^ambiguous name in condition: Payload, Source$"):
+        Filter(frame._type, "Source = 0 or Payload'Length > 368", frame._refinements)
+
+
+def test_nested_message_lazy(frame: MessageValue) -> None:
+    # pylint: disable=protected-access
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes = file.read()
+    frame.parse(msg_as_bytes)
+    payload = frame._fields["Payload"].typeval
+    assert isinstance(payload, OpaqueValue)
+    assert frame.valid_message
+    assert frame.bytestring == msg_as_bytes
+    assert payload._nested_message is None
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    assert ipv4.valid_message
+    assert ipv4.get("TTL") == 64
+    assert frame.bytestring == msg_as_bytes
+    udp = ipv4.get("Payload")
+    assert isinstance(udp, MessageValue)
+    ipv4.set("TTL", 32)
+    ipv4.set("Payload", udp.bytestring)
+    assert frame.bytestring == msg_as_bytes[:22] + b"\x20" + msg_as_bytes[23:]
+
+
+def test_nested_message_changed(ethernet_package: Package, frame: MessageValue) -> None:
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes = file.read()
+    frame.parse(msg_as_bytes)
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    ipv4.set("Total_Length", 20)
+    assert not ipv4.valid_message
+    assert frame.size == Number(272)
+    assert not frame.valid_message
+
+    frame.parse(msg_as_bytes)
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    udp = ipv4.get("Payload")
+    assert isinstance(udp, MessageValue)
+    ipv4.set("Total_Length", 64)
+    ipv4.set("Payload", udp.bytestring[:4] + b"\x00\x2c" + udp.bytestring[6:8] + bytes(36))
+    assert ipv4.valid_message
+    assert frame.valid_message
+    assert frame.size == Number(624)
+    expected = ethernet_package["Frame"]
+    expected.parse(frame.bytestring)
+    assert expected.valid_message
+    assert expected.bytestring == frame.bytestring
+
+    udp = ipv4.get("Payload")
+    assert isinstance(udp, MessageValue)
+    udp.set("Length", 58)
+    udp.set("Checksum", 0)
+    udp.set("Payload", bytes(50))
+    assert udp.valid_message
+    assert not ipv4.valid_message
+    assert not frame.valid_message
+    assert frame.size == Number(736)
+
+
+def test_reset(ethernet_package: Package, array_message: MessageValue) -> None:
+    frame = ethernet_package["Frame"]
+    with open(f"{TESTDIR}/ethernet_ipv4_udp.raw", "rb") as file:
+        frame.parse(file.read())
+    ipv4 = frame.get("Payload")
+    assert isinstance(ipv4, MessageValue)
+    udp = ipv4.get("Payload")
+    for raw in ["ethernet_vlan_tag", "ethernet_802.3", "ethernet_ipv4_udp"]:
+        frame.reset()
+        assert frame == ethernet_package["Frame"]
+        assert frame.accessible_fields == ethernet_package["Frame"].accessible_fields
+        with open(f"{TESTDIR}/{raw}.raw", "rb") as file:
+            msg_as_bytes = file.read()
+        frame.parse(msg_as_bytes)
+        expected = ethernet_package["Frame"]
+        expected.parse(msg_as_bytes)
+        assert frame == expected
+        assert frame.valid_fields == expected.valid_fields
+        assert frame.bytestring == msg_as_bytes
+    assert frame.get("Payload") is ipv4
+    assert ipv4.get("Payload") is udp
+
+    array_message.parse(b"\x02\x05\x06")
+    foos = array_message.get("Bar")
+    assert isinstance(foos, list)
+    array_message.reset()
+    assert array_message.valid_fields == []
+    array_message.parse(b"\x02\x07\x08")
+    bar = array_message.get("Bar")
+    assert isinstance(bar, list)
+    assert all(a is b for a, b in zip(bar, foos))
+    assert [foo.get("Byte") for foo in bar if isinstance(foo, MessageValue)] == [7, 8]
 
 
 # rflx-ethernet-tests.adb
@@ -1190,6 +2099,61 @@ def test_ethernet_generating_udp_in_ipv4_in_ethernet(
     assert frame.bytestring == parsed_frame
 
 
+def test_ethernet_generating_udp_in_ipv4_in_ethernet_set_fields(
+    frame: MessageValue, ipv4: MessageValue, udp: MessageValue
+) -> None:
+    with open("tests/ethernet_ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+
+    udp.set_fields(
+        {
+            "Payload": bytes(18),
+            "Checksum": int("014E", 16),
+            "Length": 26,
+            "Destination_Port": 53,
+            "Source_Port": 53,
+        }
+    )
+    assert udp.valid_message
+    ipv4.set_fields(
+        {
+            "Version": 4,
+            "IHL": 5,
+            "DSCP": 0,
+            "ECN": 0,
+            "Total_Length": 46,
+            "Identification": 1,
+            "Flag_R": "False",
+            "Flag_DF": "False",
+            "Flag_MF": "False",
+            "Fragment_Offset": 0,
+            "TTL": 64,
+            "Protocol": "PROTOCOL_UDP",
+            "Header_Checksum": int("7CBC", 16),
+            "Source": int("7f000001", 16),
+            "Destination": int("7f000001", 16),
+            "Payload": udp.bytestring,
+        }
+    )
+    assert ipv4.valid_message
+    frame.set_fields(
+        {"Source": 0, "Type_Length_TPID": int("0800", 16), "Type_Length": int("0800", 16)}
+    )
+    assert frame.valid_fields == ["Source", "Type_Length_TPID", "Type_Length"]
+    frame.set_fields({"Destination": int("FFFFFFFFFFFF", 16), "Payload": ipv4.bytestring})
+    assert frame.valid_message
+    assert frame.bytestring == msg_as_bytes
+
+    with pytest.raises(KeyError, match=r"^'cannot access field Foo'$"):
+        frame.set_fields({"Foo": 0})
+    with pytest.raises(
+        ValueError,
+        match=r"^none of the field conditions \['Type_Length <= 1500', 'Type_Length >= 1536'\]"
+        r" for field Type_Length have been met by the assigned value: 1501$",
+    ):
+        frame.set_fields({"Type_Length_TPID": 1501, "Type_Length": 1501})
+
+
 # rflx-ipv4-tests.adb
 
 
@@ -1215,6 +2179,48 @@ def test_ipv4_parsing_ipv4(ipv4: MessageValue) -> None:
     assert ipv4._fields["Payload"].typeval.size == Number(192)
 
 
+def test_ipv4_parsing_ipv4_lazy(ipv4: MessageValue) -> None:
+    # pylint: disable=protected-access
+    with open("tests/ipv4_udp.raw", "rb") as file:
+        msg_as_bytes: bytes = file.read()
+    ipv4.parse(msg_as_bytes, lazy=True)
+    assert ipv4.valid_message
+    assert ipv4._fields["TTL"].pending is not None
+    assert ipv4._fields["Payload"].pending is not None
+    assert ipv4._fields["IHL"].pending is None
+    assert ipv4._fields["Protocol"].pending is None
+    assert ipv4.bytestring == msg_as_bytes
+    assert ipv4.get("TTL") == 64
+    assert ipv4._fields["TTL"].pending is None
+    nested_udp = ipv4.get("Payload")
+    assert isinstance(nested_udp, MessageValue)
+    assert nested_udp.valid_message
+
+    with pytest.raises(
+        ValueError,
+        match=r"^Error while setting value for field Version: value 5 not in type range 4 .. 4$",
+    ):
+        ipv4.parse(b"\x55" + msg_as_bytes[1:], lazy=True)
+    assert not ipv4.valid_message
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "55000020000100004011 7cbe7f0000017f000001",
+        "46000030000100004011 7cbe7f0000017f000001 ffffffff",
+    ],
+)
+def test_ipv4_parsing_lazy_invalid(ipv4: MessageValue, header: str) -> None:
+    with open("tests/ipv4_udp.raw", "rb") as file:
+        data = bytes.fromhex(header) + file.read()[20:]
+    with pytest.raises(ValueError, match=r"^Error while setting value for field"):
+        copy(ipv4).parse(data)
+    with pytest.raises(ValueError, match=r"^Error while setting value for field"):
+        ipv4.parse(data, lazy=True)
+    assert not ipv4.valid_message
+
+
 def test_ipv4_parsing_ipv4_option(ipv4_option: MessageValue) -> None:
     expected = b"\x44\x03\x2a"
     ipv4_option.parse(expected)